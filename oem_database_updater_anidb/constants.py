@@ -50,3 +50,15 @@ COLLECTION_KEYS_TMDB = [
 COLLECTION_KEYS_TVDB = [
     'tvdb'
 ]
+
+#
+# Identifiers
+#
+
+IDENTIFIER_ATTRIBUTES = {
+    'anidb': 'anidbid',
+    'imdb': 'imdbid',
+    'tmdb:movie': 'tmdbmid',
+    'tmdb:show': 'tmdbsid',
+    'tvdb': 'tvdbid'
+}
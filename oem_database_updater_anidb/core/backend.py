@@ -0,0 +1,95 @@
+import logging
+
+try:
+    from xml.etree import cElementTree as ElementTree
+except ImportError:
+    from xml.etree import ElementTree
+
+log = logging.getLogger(__name__)
+
+
+class ElementTreeBackend(object):
+    __key__ = 'etree'
+
+    @staticmethod
+    def available():
+        return True
+
+    @staticmethod
+    def fromstring(data):
+        return ElementTree.fromstring(data)
+
+
+class LxmlBackend(object):
+    __key__ = 'lxml'
+
+    etree = None
+    parser = None
+
+    @classmethod
+    def available(cls):
+        return cls.load() is not None
+
+    @classmethod
+    def load(cls):
+        if cls.etree is not None:
+            return cls.etree
+
+        # Import lxml on first use (reduces startup time)
+        try:
+            from lxml import etree
+        except ImportError:
+            return None
+
+        cls.etree = etree
+        return etree
+
+    @classmethod
+    def fromstring(cls, data):
+        if cls.parser is None:
+            cls.parser = cls.load().XMLParser(resolve_entities=False)
+
+        return cls.etree.fromstring(data, cls.parser)
+
+
+BACKENDS = dict([
+    (backend.__key__, backend)
+    for backend in [ElementTreeBackend, LxmlBackend]
+])
+
+
+class XmlBackend(object):
+    backend = None
+
+    @classmethod
+    def configure(cls, key=None):
+        cls.backend = cls.get(key)
+
+        log.debug('Using %r xml backend', cls.backend.__key__)
+        return cls.backend
+
+    @classmethod
+    def current(cls):
+        if cls.backend is None:
+            cls.backend = cls.get()
+
+        return cls.backend
+
+    @staticmethod
+    def get(key=None):
+        if not key or key == 'auto':
+            # Use lxml when available (elements are parsed from mapped slices, where lxml is faster)
+            if LxmlBackend.available():
+                return LxmlBackend
+
+            return ElementTreeBackend
+
+        if key not in BACKENDS:
+            raise ValueError('Unknown backend: %r' % (key,))
+
+        backend = BACKENDS[key]
+
+        if not backend.available():
+            raise ValueError('Backend %r is not available' % (key,))
+
+        return backend
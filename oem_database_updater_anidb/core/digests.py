@@ -0,0 +1,184 @@
+from oem_database_updater_anidb.constants import IDENTIFIER_ATTRIBUTES
+from oem_database_updater_anidb.core.mapped import MappedSource
+from oem_database_updater_anidb.parsers.core import absolute, records
+
+import hashlib
+import io
+import json
+import logging
+import os
+import six
+
+log = logging.getLogger(__name__)
+
+VERSION = 2
+
+
+def get_version():
+    # Include versions of the item hash formats (changes require all items to be processed)
+    return [VERSION, records.VERSION, absolute.VERSION]
+
+
+def get_node_id(node):
+    return node.attrib.get('anidbid')
+
+
+def get_node_keys(attrib, service):
+    value = attrib.get(IDENTIFIER_ATTRIBUTES[service])
+
+    if not value:
+        return []
+
+    return [
+        key for key in value.split(',')
+        if key and key != 'unknown'
+    ]
+
+
+def digest_element(element):
+    return hashlib.sha1(element.data()).hexdigest()
+
+
+def scan_digests(source_path, source=None):
+    if source is None:
+        with MappedSource(source_path) as source:
+            return scan_digests(source_path, source)
+
+    digests = {}
+
+    for node in source.iter_elements():
+        node_id = get_node_id(node)
+
+        if not node_id:
+            continue
+
+        digest = digest_element(node)
+
+        # Combine digests of nodes with duplicate identifiers
+        if node_id in digests:
+            digest = hashlib.sha1((digests[node_id][0] + digest).encode('ascii')).hexdigest()
+
+        digests[node_id] = (digest, dict(node.attrib))
+
+    return digests
+
+
+class DigestIndex(object):
+    def __init__(self, path, service):
+        self.path = path
+        self.service = service
+
+        self.previous = {}
+        self.current = {}
+
+        self.dirty = set()
+        self.committed = {}
+
+    @classmethod
+    def open(cls, directory, collection):
+        name = '%s-%s.json' % (collection.source, collection.target)
+
+        # Ensure directory exists
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Construct index
+        index = cls(os.path.join(directory, name.replace(':', '.')), collection.source)
+        index.load()
+        return index
+
+    def load(self):
+        self.previous = {}
+
+        if not os.path.exists(self.path):
+            return False
+
+        try:
+            with io.open(self.path, 'r', encoding='utf-8') as fp:
+                data = json.load(fp)
+        except Exception as ex:
+            log.warn('Unable to load digest index %r - %s', self.path, ex)
+            return False
+
+        if data.get('version') != get_version():
+            log.info('Digest index %r is out of date, all items will be processed', self.path)
+            return False
+
+        self.previous = dict([
+            (node_id, (digest, keys))
+            for node_id, (digest, keys) in data.get('items', {}).items()
+        ])
+        return True
+
+    def save(self):
+        data = json.dumps({
+            'version': get_version(),
+            'items': self.committed
+        }, sort_keys=True)
+
+        # Write index to temporary file, then replace the current index
+        path = self.path + '.tmp'
+
+        with io.open(path, 'w', encoding='utf-8') as fp:
+            fp.write(six.text_type(data))
+
+        if os.name == 'nt' and os.path.exists(self.path):
+            os.remove(self.path)
+
+        os.rename(path, self.path)
+
+    def prepare(self, digests):
+        self.current = {}
+        self.dirty = set()
+
+        self.committed = {}
+
+        for node_id, (digest, attrib) in digests.items():
+            keys = get_node_keys(attrib, self.service)
+
+            self.current[node_id] = (digest, keys)
+
+            # Mark groups of new or changed nodes as dirty
+            previous = self.previous.get(node_id)
+
+            if previous is not None and previous[0] == digest:
+                continue
+
+            self.dirty.update(keys)
+
+            if previous is not None:
+                self.dirty.update(previous[1])
+
+        # Mark groups of removed nodes as dirty
+        for node_id, (_, keys) in self.previous.items():
+            if node_id not in self.current:
+                self.dirty.update(keys)
+
+    def changed(self, node):
+        node_id = get_node_id(node)
+
+        if node_id not in self.current:
+            return True
+
+        digest, keys = self.current[node_id]
+
+        # Ensure node hasn't changed
+        previous = self.previous.get(node_id)
+
+        if previous is None or previous[0] != digest:
+            return True
+
+        # Ensure node isn't merged with any changed nodes
+        for key in keys:
+            if key in self.dirty:
+                return True
+
+        return False
+
+    def commit(self, node):
+        node_id = get_node_id(node)
+
+        if node_id not in self.current:
+            return
+
+        self.committed[node_id] = self.current[node_id]
@@ -0,0 +1,82 @@
+from oem_database_updater_anidb.constants import IDENTIFIER_ATTRIBUTES
+from oem_database_updater_anidb.core.digests import get_node_keys
+from oem_database_updater_anidb.core.mapped import MappedSource
+from oem_database_updater_anidb.core.scanner import iter_attributes
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class IdentifierIndex(object):
+    def __init__(self, source_path, source=None):
+        self.source_path = source_path
+        self.source = source
+
+        self.mapped = None
+
+        self.offsets = dict([
+            (service, {})
+            for service in IDENTIFIER_ATTRIBUTES
+        ])
+
+    @classmethod
+    def build(cls, source_path, source=None):
+        index = cls(source_path, source)
+
+        if source is not None:
+            # Scan elements of the mapped source file
+            for element in source.iter_elements():
+                index.add(element.start, element.attrib)
+
+            return index
+
+        # Scan start tags of the source file
+        for offset, attrib in iter_attributes(source_path):
+            index.add(offset, attrib)
+
+        return index
+
+    def add(self, offset, attrib):
+        for service, offsets in self.offsets.items():
+            for key in get_node_keys(attrib, service):
+                if key not in offsets:
+                    offsets[key] = [offset]
+                else:
+                    offsets[key].append(offset)
+
+    def get(self, service, key):
+        if service not in self.offsets:
+            raise ValueError('Unknown service: %r' % (service,))
+
+        return self.offsets[service].get(key, [])
+
+    def get_group(self, service, keys):
+        offsets = set()
+
+        for key in keys:
+            offsets.update(self.get(service, key))
+
+        return sorted(offsets)
+
+    def iter_nodes(self, offsets):
+        source = self.source
+
+        if source is None:
+            # Map source file into memory (kept open until the index is closed)
+            if self.mapped is None:
+                self.mapped = MappedSource(self.source_path).open()
+
+            source = self.mapped
+
+        for offset in sorted(set(offsets)):
+            yield source.element_at(offset).parse()
+
+    def lookup(self, service, key):
+        return list(self.iter_nodes(self.get(service, key)))
+
+    def close(self):
+        if self.mapped is not None:
+            self.mapped.close()
+
+        self.mapped = None
@@ -0,0 +1,115 @@
+from oem_database_updater_anidb.core.backend import XmlBackend
+from oem_database_updater_anidb.core.scanner import RE_ANIME_START, find_end, find_start, parse_attributes
+
+import io
+import logging
+import mmap
+
+log = logging.getLogger(__name__)
+
+
+class MappedElement(object):
+    __slots__ = ['source', 'start', 'end', 'attrib', '_node']
+
+    tag = 'anime'
+
+    def __init__(self, source, start, end, attrib):
+        self.source = source
+
+        self.start = start
+        self.end = end
+
+        self.attrib = attrib
+
+        self._node = None
+
+    def data(self):
+        return self.source.data[self.start:self.end]
+
+    def parse(self):
+        if self._node is None:
+            self._node = XmlBackend.current().fromstring(self.data())
+
+        return self._node
+
+    def __repr__(self):
+        return '<MappedElement anidbid: %r (%d-%d)>' % (self.attrib.get('anidbid'), self.start, self.end)
+
+
+class MappedSource(object):
+    def __init__(self, path):
+        self.path = path
+
+        self.fp = None
+        self.data = None
+
+    def open(self):
+        if self.data is not None:
+            return self
+
+        self.fp = io.open(self.path, 'rb')
+
+        try:
+            self.data = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            self.data = b''
+
+        return self
+
+    def close(self):
+        if self.data is not None and not isinstance(self.data, bytes):
+            self.data.close()
+
+        if self.fp is not None:
+            self.fp.close()
+
+        self.fp = None
+        self.data = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def element_at(self, offset):
+        match = RE_ANIME_START.match(self.data, offset)
+
+        if not match:
+            raise ValueError('Unable to find element at offset %d' % offset)
+
+        return self.build_element(match)
+
+    def iter_elements(self, start=0, end=None):
+        if end is None:
+            end = len(self.data)
+
+        position = start
+
+        while position < end:
+            match = find_start(self.data, position)
+
+            # Elements are included in the range their start tag begins in
+            if not match or match.start() >= end:
+                break
+
+            element = self.build_element(match)
+
+            yield element
+
+            position = element.end
+
+    def build_element(self, match):
+        attributes = match.group(1)
+
+        # Find end of element
+        if attributes.endswith(b'/'):
+            end = match.end()
+        else:
+            end = find_end(self.data, match.end())
+
+            if end < 0:
+                raise ValueError('Unable to find end of element at offset %d' % match.start())
+
+        return MappedElement(self, match.start(), end, parse_attributes(attributes))
@@ -0,0 +1,13 @@
+class BoundedCache(dict):
+    def __init__(self, size):
+        super(BoundedCache, self).__init__()
+
+        self.size = size
+
+    def set(self, key, value):
+        # Reset cache when full
+        if len(self) >= self.size:
+            self.clear()
+
+        self[key] = value
+        return value
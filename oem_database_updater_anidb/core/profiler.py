@@ -0,0 +1,183 @@
+from oem_framework.core.elapsed import Elapsed
+
+import functools
+import io
+import math
+import six
+import sys
+import threading
+import time
+
+# Stages are measured exclusively (time spent in nested stages is only counted once)
+STAGES = [
+    'record',
+    'parse',
+    'fetch',
+    'hash',
+    'write'
+]
+
+STDOUT_VALUES = ['1', 'true', 'yes', 'on', '-', 'stdout']
+
+
+def percentile(samples, value):
+    if not samples:
+        return 0
+
+    samples = sorted(samples)
+
+    return samples[max(0, int(math.ceil(value * len(samples))) - 1)]
+
+
+class Profiler(object):
+    current = None
+
+    def __init__(self):
+        self.started_at = None
+        self.elapsed = None
+
+        self.offsets = {}
+
+        self.thread = None
+        self.stack = []
+        self.stages = dict([(stage, []) for stage in STAGES])
+
+    def start(self):
+        self.started_at = time.time()
+
+        # Store current sample counts (samples are shared by all runs in the process)
+        self.offsets = dict([
+            (name, (len(groups['success']), len(groups['failure'])))
+            for name, groups in Elapsed.samples.items()
+        ])
+
+        # Measure stages on the current thread
+        self.thread = threading.current_thread()
+
+        Profiler.current = self
+        return self
+
+    def stop(self):
+        self.elapsed = (time.time() - self.started_at) * 1000
+
+        if Profiler.current is self:
+            Profiler.current = None
+
+    @classmethod
+    def stage(cls, name):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                profiler = cls.current
+
+                # Ignore calls when profiling is disabled (or from other threads)
+                if profiler is None or profiler.thread is not threading.current_thread():
+                    return func(*args, **kwargs)
+
+                return profiler.measure(name, func, *args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def measure(self, stage, func, *args, **kwargs):
+        self.stack.append(0)
+        started_at = time.time()
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = (time.time() - started_at) * 1000
+            nested = self.stack.pop()
+
+            # Exclude time spent in nested stages
+            if self.stack:
+                self.stack[-1] += elapsed
+
+            self.stages[stage].append(elapsed - nested)
+
+    def get_samples(self, name):
+        groups = Elapsed.samples.get(name)
+
+        if not groups:
+            return []
+
+        success, failure = self.offsets.get(name, (0, 0))
+
+        return groups['success'][success:] + groups['failure'][failure:]
+
+    def get_functions(self):
+        functions = []
+
+        for name in sorted(Elapsed.samples.keys()):
+            samples = self.get_samples(name)
+
+            if not samples:
+                continue
+
+            functions.append((name, self.calculate(samples)))
+
+        # Sort by total elapsed time
+        functions.sort(key=lambda item: item[1]['total'], reverse=True)
+        return functions
+
+    def get_stages(self):
+        return [
+            (stage, self.calculate(self.stages[stage]))
+            for stage in STAGES
+        ]
+
+    def format(self):
+        line_format = '%-36s %10s %14s %12s %12s %8s'
+
+        # Functions
+        yield 'AniDB profile (elapsed: %.0f ms)' % (self.elapsed or 0)
+        yield ''
+        yield line_format % ('Function', 'Calls', 'Total (ms)', 'Mean (ms)', 'P95 (ms)', 'Share')
+
+        for name, statistics in self.get_functions():
+            yield self.format_row(line_format, name, statistics)
+
+        # Stages
+        yield ''
+        yield line_format % ('Stage', 'Calls', 'Total (ms)', 'Mean (ms)', 'P95 (ms)', 'Share')
+
+        for stage, statistics in self.get_stages():
+            yield self.format_row(line_format, stage, statistics)
+
+    def format_row(self, line_format, name, statistics):
+        share = 0
+
+        if self.elapsed:
+            share = statistics['total'] / self.elapsed * 100
+
+        return line_format % (
+            name,
+            statistics['count'],
+            '%.1f' % statistics['total'],
+            '%.2f' % statistics['mean'],
+            '%.2f' % statistics['p95'],
+            '%.1f%%' % share
+        )
+
+    def write(self, destination):
+        lines = list(self.format())
+
+        if destination.lower() in STDOUT_VALUES:
+            sys.stdout.write('\n'.join(lines) + '\n')
+            sys.stdout.flush()
+            return
+
+        with io.open(destination, 'w', encoding='utf-8') as fp:
+            fp.write(six.text_type('\n'.join(lines) + '\n'))
+
+    @staticmethod
+    def calculate(samples):
+        total = sum(samples)
+
+        return {
+            'count': len(samples),
+            'total': total,
+            'mean': total / len(samples) if samples else 0,
+            'p95': percentile(samples, 0.95)
+        }
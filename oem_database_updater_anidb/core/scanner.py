@@ -0,0 +1,126 @@
+import io
+import mmap
+import re
+import six
+
+ENTITIES = {
+    'lt': '<',
+    'gt': '>',
+    'quot': '"',
+    'apos': "'",
+    'amp': '&'
+}
+
+RE_ANIME_START = re.compile(br'<anime(?=[\s/>])([^>]*)>')
+RE_END_TAG = re.compile(br'</anime\s*>')
+RE_ATTRIBUTE = re.compile(br'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+RE_ENTITY = re.compile(r'&(?:#x([0-9a-fA-F]+)|#([0-9]+)|(lt|gt|quot|apos|amp));')
+
+# Comments and CDATA sections are matched (and skipped) before tags
+RE_START = re.compile(br'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<anime(?=[\s/>])([^>]*)>', re.S)
+RE_END = re.compile(br'<!--.*?-->|<!\[CDATA\[.*?\]\]>|(</anime\s*>)', re.S)
+
+
+def find_start(data, position=0):
+    match = RE_ANIME_START.search(data, position)
+
+    # Use the first start tag (if no comments or CDATA sections precede it)
+    if match is None or data.find(b'<!', position, match.start()) < 0:
+        return match
+
+    while True:
+        match = RE_START.search(data, position)
+
+        if match is None:
+            return None
+
+        # Start tag
+        if match.group(1) is not None:
+            return match
+
+        # Skip comment or CDATA section
+        position = match.end()
+
+
+def find_end(data, position=0):
+    end = data.find(b'</anime', position)
+
+    if end < 0:
+        return -1
+
+    # Use the first end tag (if no comments or CDATA sections precede it)
+    if data.find(b'<!', position, end) < 0:
+        match = RE_END_TAG.match(data, end)
+
+        if match is not None:
+            return match.end()
+
+    while True:
+        match = RE_END.search(data, position)
+
+        if match is None:
+            return -1
+
+        # End tag
+        if match.group(1) is not None:
+            return match.end()
+
+        # Skip comment or CDATA section
+        position = match.end()
+
+
+def parse_attributes(data):
+    attrib = {}
+
+    for match in RE_ATTRIBUTE.finditer(data):
+        key, value = match.group(1), match.group(2)
+
+        if value is None:
+            value = match.group(3)
+
+        attrib[key.decode('utf-8')] = unescape(value.decode('utf-8'))
+
+    return attrib
+
+
+def unescape(value):
+    if '&' not in value:
+        return value
+
+    return RE_ENTITY.sub(replace_entity, value)
+
+
+def replace_entity(match):
+    hexadecimal, decimal, name = match.groups()
+
+    if hexadecimal:
+        return six.unichr(int(hexadecimal, 16))
+
+    if decimal:
+        return six.unichr(int(decimal))
+
+    return ENTITIES[name]
+
+
+def iter_attributes(source_path):
+    with io.open(source_path, 'rb') as fp:
+        try:
+            data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            return
+
+        try:
+            position = 0
+
+            while True:
+                match = find_start(data, position)
+
+                if match is None:
+                    break
+
+                yield match.start(), parse_attributes(match.group(1))
+
+                position = match.end()
+        finally:
+            data.close()
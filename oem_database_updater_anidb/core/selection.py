@@ -0,0 +1,80 @@
+from oem_database_updater_anidb.constants import IDENTIFIER_ATTRIBUTES
+from oem_database_updater_anidb.core.digests import get_node_id, get_node_keys
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+def parse_selectors(value):
+    selectors = []
+
+    for selector in value.split(','):
+        selector = selector.strip()
+
+        if not selector:
+            continue
+
+        # Parse selector (key may contain ":", e.g. "tmdb:movie:1234")
+        service, sep, key = selector.rpartition(':')
+
+        if not sep:
+            service, key = 'anidb', selector
+
+        if service not in IDENTIFIER_ATTRIBUTES:
+            raise ValueError('Unknown service: %r' % (service,))
+
+        if not key:
+            raise ValueError('Invalid selector: %r' % (selector,))
+
+        selectors.append((service, key))
+
+    if not selectors:
+        raise ValueError('No identifiers provided')
+
+    return selectors
+
+
+class Selection(object):
+    def __init__(self, index, service):
+        self.index = index
+        self.service = service
+
+        self.offsets = set()
+        self.node_ids = set()
+
+    def __contains__(self, node):
+        return get_node_id(node) in self.node_ids
+
+    def resolve(self, selectors):
+        pending = set()
+
+        for service, key in selectors:
+            offsets = self.index.get(service, key)
+
+            if not offsets:
+                log.warn('No items found matching %s:%s', service, key)
+
+            pending.update(offsets)
+
+        # Expand selection to include the merge groups of matched nodes
+        while pending:
+            self.offsets.update(pending)
+
+            # Retrieve group members of pending nodes
+            members = set()
+
+            for node in self.index.iter_nodes(pending):
+                node_id = get_node_id(node)
+
+                if node_id:
+                    self.node_ids.add(node_id)
+
+                    # Include nodes with duplicate identifiers (nodes are matched by identifier)
+                    members.update(self.index.get_group('anidb', node_id.split(',')))
+
+                members.update(self.index.get_group(self.service, get_node_keys(node.attrib, self.service)))
+
+            pending = members - self.offsets
+
+        return self
@@ -0,0 +1,165 @@
+from oem_database_updater_anidb.core.backend import XmlBackend
+from oem_database_updater_anidb.parsers import Parser
+
+import logging
+import multiprocessing
+
+log = logging.getLogger(__name__)
+
+COLLECTIONS = {}
+REFERENCES = {}
+
+
+class CollectionReference(object):
+    def __init__(self, source, target, binary=False):
+        self.source = source
+        self.target = target
+
+        # Storage format flag (used to hash records in worker processes)
+        self.binary = binary
+
+    def __reduce__(self):
+        # Resolve reference to the registered collection when unpickled
+        return resolve_collection, (self.source, self.target)
+
+    def __repr__(self):
+        return '<CollectionReference %s -> %s>' % (self.source, self.target)
+
+
+def register_collection(collection):
+    COLLECTIONS[(collection.source, collection.target)] = collection
+
+
+def resolve_collection(source, target):
+    collection = COLLECTIONS.get((source, target))
+
+    if collection is None:
+        return CollectionReference(source, target)
+
+    return collection
+
+
+def get_reference(source, target, binary):
+    # Retrieve reference (shared by all tasks for the collection)
+    reference = REFERENCES.get((source, target))
+
+    if reference is None:
+        reference = REFERENCES[(source, target)] = CollectionReference(source, target, binary)
+
+    return reference
+
+
+def parse_node(task):
+    data, keys, backend, use_absolute_mapper = task
+
+    if data is None:
+        return [None] * len(keys)
+
+    # Parse node
+    node = XmlBackend.get(backend).fromstring(data)
+
+    # Parse items for each collection
+    results = Parser.parse_many(
+        [
+            get_reference(key[0], key[1], key[2]) if key is not None else None
+            for key in keys
+        ],
+        node,
+        use_absolute_mapper=use_absolute_mapper
+    )
+
+    # Hash records before they are returned to the main process
+    for records in results:
+        if records is None:
+            continue
+
+        for record in records:
+            record.prepare()
+
+    return results
+
+
+class ParserPool(object):
+    def __init__(self, collections, workers, batch_size=None, use_absolute_mapper=True):
+        self.keys = [
+            (collection.source, collection.target, collection.storage.format.__supports_binary__)
+            for collection in collections
+        ]
+        self.workers = workers
+
+        self.batch_size = batch_size or workers * 64
+        self.use_absolute_mapper = use_absolute_mapper
+
+        # Register collections (parsed items are bound to these when returned from workers)
+        for collection in collections:
+            register_collection(collection)
+
+        self.pool = None
+
+    def start(self):
+        if self.pool is not None:
+            return self
+
+        log.debug('Starting %d parser workers', self.workers)
+        self.pool = multiprocessing.Pool(self.workers)
+        return self
+
+    def stop(self):
+        if self.pool is None:
+            return
+
+        self.pool.close()
+        self.pool.join()
+
+        self.pool = None
+
+    def parse(self, nodes, accepts=None):
+        self.start()
+
+        try:
+            batch = []
+
+            for node in nodes:
+                # Retrieve collections that accept the node
+                keys = self.keys
+
+                if accepts is not None:
+                    keys = [
+                        key if accepted else None
+                        for key, accepted in zip(self.keys, accepts(node))
+                    ]
+
+                # Retrieve raw element data (nodes are only parsed by workers)
+                batch.append((
+                    node,
+                    node.data() if any(keys) else None,
+                    keys
+                ))
+
+                if len(batch) < self.batch_size:
+                    continue
+
+                for result in self.parse_batch(batch):
+                    yield result
+
+                batch = []
+
+            # Parse remaining nodes
+            for result in self.parse_batch(batch):
+                yield result
+        finally:
+            self.stop()
+
+    def parse_batch(self, batch):
+        if not batch:
+            return []
+
+        results = self.pool.map(parse_node, [
+            (data, keys, XmlBackend.current().__key__, self.use_absolute_mapper)
+            for _, data, keys in batch
+        ], max(1, len(batch) // (self.workers * 4)))
+
+        return [
+            (node, items)
+            for (node, _, _), items in zip(batch, results)
+        ]
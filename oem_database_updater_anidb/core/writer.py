@@ -0,0 +1,103 @@
+import logging
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class PendingWrite(object):
+    __slots__ = ['service', 'key', 'metadata', 'created', 'item', 'hashes']
+
+    def __init__(self, service, key, metadata, created=False):
+        self.service = service
+        self.key = key
+
+        self.metadata = metadata
+        self.created = created
+
+        self.item = None
+        self.hashes = []
+
+
+class MetadataWriter(object):
+    def __init__(self, collection, batch_size=DEFAULT_BATCH_SIZE):
+        self.collection = collection
+        self.batch_size = batch_size
+
+        self.pending = {}
+        self.order = []
+
+        self.count_failed = 0
+
+    def get(self, key):
+        # Retrieve metadata from pending writes (created items haven't been stored in the collection yet)
+        write = self.pending.get(key)
+
+        if write is not None:
+            return write.metadata
+
+        return self.collection.get(key)
+
+    def create(self, service, key):
+        metadata = self.collection.index.create(key)
+
+        # Queue creation of metadata
+        self.queue(service, key, metadata, created=True)
+        return metadata
+
+    def write(self, service, key, metadata, item, hash_key, hash):
+        write = self.queue(service, key, metadata)
+
+        # Update pending item (only the latest item for each key is written)
+        write.item = item
+        write.hashes.append((hash_key, hash))
+
+        # Flush writes (if the batch is full)
+        if self.batch_size and len(self.pending) >= self.batch_size:
+            self.flush()
+
+        return True
+
+    def queue(self, service, key, metadata, created=False):
+        write = self.pending.get(key)
+
+        if write is not None:
+            return write
+
+        write = self.pending[key] = PendingWrite(service, key, metadata, created)
+        self.order.append(key)
+
+        return write
+
+    def flush(self):
+        if not self.order:
+            return True
+
+        success = True
+
+        for key in self.order:
+            write = self.pending[key]
+
+            if write.item is None:
+                continue
+
+            # Store created metadata in the collection
+            if write.created:
+                self.collection.set(key, write.metadata)
+
+            # Update hashes of previous writes
+            for hash_key, hash in write.hashes[:-1]:
+                write.metadata.hashes[hash_key] = hash
+
+            # Write item
+            hash_key, hash = write.hashes[-1]
+
+            if not write.metadata.update(write.item, hash_key, hash):
+                log.warn('[%-5s] Unable to update item: %r', write.service, key)
+                self.count_failed += 1
+                success = False
+
+        self.pending = {}
+        self.order = []
+
+        return success
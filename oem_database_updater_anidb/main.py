@@ -1,12 +1,28 @@
 from oem_framework.core.elapsed import Elapsed
+from oem_framework.core.helpers import try_convert
 from oem_updater.core.sources.base import Source
 from oem_database_updater_anidb.constants import COLLECTIONS
+from oem_database_updater_anidb.core.backend import XmlBackend
+from oem_database_updater_anidb.core.digests import DigestIndex, scan_digests
+from oem_database_updater_anidb.core.index import IdentifierIndex
+from oem_database_updater_anidb.core.profiler import Profiler
+from oem_database_updater_anidb.core.mapped import MappedSource
+from oem_database_updater_anidb.core.selection import Selection, parse_selectors
+from oem_database_updater_anidb.core.workers import ParserPool
+from oem_database_updater_anidb.core.writer import DEFAULT_BATCH_SIZE, MetadataWriter
+from oem_database_updater_anidb.metadata.core.cache import MetadataCache
+from oem_database_updater_anidb.metadata.core.fixtures import FixtureStore
+from oem_database_updater_anidb.metadata.core.identifiers import TMDbIdentifiers
+from oem_database_updater_anidb.metadata.core.transport import HttpTransport
+from oem_database_updater_anidb.metadata.prefetch import Prefetcher
 from oem_database_updater_anidb.parsers import Parser
+from oem_database_updater_anidb.parsers.core.records import ItemGroup
 
 from xml.etree import ElementTree
 import logging
 import os
 import sys
+import weakref
 
 log = logging.getLogger(__name__)
 
@@ -16,82 +32,466 @@ class AniDB(Source):
     __collections__ = COLLECTIONS
 
     __parameters__ = [
-        {'name': 'source'}
+        {'name': 'source'},
+        {'name': 'workers'},
+        {'name': 'prefetch'},
+        {'name': 'profile'},
+        {'name': 'digests'},
+        {'name': 'only'},
+        {'name': 'xml-backend'},
+        {'name': 'write-batch-size'},
+
+        {'name': 'cache'},
+        {'name': 'cache-ttl'},
+        {'name': 'cache-negative-ttl'},
+        {'name': 'cache-size'},
+
+        {'name': 'http-pool-size'},
+        {'name': 'http-retries'},
+        {'name': 'http-timeout'},
+
+        {'name': 'tmdb-movie-ids'},
+        {'name': 'tmdb-show-ids'},
+
+        {'name': 'fixtures'},
+        {'name': 'fixtures-mode'}
     ]
 
+    pending = weakref.WeakSet()
+
     def __init__(self, collection, kwargs):
         super(AniDB, self).__init__(collection, kwargs)
 
+        self.result = None
+
         self.seen = {}
         self.updated = {}
 
+        self.digests = None
+        self.selection = None
+
+        self.writer = MetadataWriter(self.collection)
+
+        self.count_total = 0
+        self.count_updated = 0
+
+        # Register source (collections are processed together when the first source is run), this assumes the
+        # updater constructs every source before running any of them, sources constructed later are run separately
+        AniDB.pending.add(self)
+
     def run(self):
+        # Source has already been processed (in a single pass with another collection)
+        if self.result is not None:
+            return self.result
+
+        # Process all pending collections that share the same source file
+        sources = self.get_group()
+
+        try:
+            result = self.run_many(sources)
+        finally:
+            self.release(sources)
+
+        for source in sources:
+            source.result = result
+
+        return result
+
+    def get_group(self):
+        return [self] + [
+            source for source in AniDB.pending
+            if source is not self and source.result is None and source.param('source') == self.param('source')
+        ]
+
+    @staticmethod
+    def release(sources):
+        for source in sources:
+            AniDB.pending.discard(source)
+
+    @classmethod
+    def run_many(cls, sources):
+        if not sources:
+            return True
+
+        # Retrieve source path
+        source_path = sources[0].get_source_path()
+
+        if not source_path:
+            return False
+
+        # Process items
+        if not cls.process_many(sources, source_path):
+            return False
+
+        return True
+
+    def get_source_path(self):
         # Retrieve source path
         source_path = self.param('source')
 
         if not source_path:
             log.error('Invalid value provided for the "--anidb-source" parameter')
-            return False
+            return None
 
         # Ensure `source_path` exists
         if not os.path.exists(source_path):
             log.error('Path %r doesn\'t exist', source_path)
-            return False
+            return None
 
-        # Process items
-        if not self.process(source_path):
+        return source_path
+
+    def process(self, source_path):
+        return self.process_many([self], source_path)
+
+    @classmethod
+    def process_many(cls, sources, source_path):
+        if not sources:
+            return True
+
+        profile = sources[0].param('profile')
+
+        # Start profiler
+        profiler = Profiler().start() if profile else None
+
+        try:
+            success = cls.process_sources(sources, source_path)
+        finally:
+            # Release sources and parser caches (collections aren't retained between runs)
+            cls.release(sources)
+            Parser.clear_caches()
+
+            if profiler:
+                profiler.stop()
+
+        # Write profile report
+        if success and profiler:
+            profiler.write(profile)
+
+        return success
+
+    @classmethod
+    def process_sources(cls, sources, source_path):
+        progress = sources[0].param('progress')
+
+        # Configure metadata cache
+        cls.configure_cache(sources[0])
+
+        # Configure http transport
+        cls.configure_transport(sources[0])
+
+        # Configure metadata fixtures
+        if not cls.configure_fixtures(sources[0]):
             return False
 
-        return True
+        # Configure TMDb identifier exports
+        if not cls.configure_identifiers(sources[0]):
+            return False
 
-    def process(self, source_path):
-        progress = self.param('progress')
+        # Configure xml backend
+        if not cls.configure_backend(sources[0]):
+            return False
 
-        # Process items
-        count_total = 0
-        count_updated = 0
+        # Configure metadata writers
+        batch_size = try_convert(sources[0].param('write-batch-size'), int, DEFAULT_BATCH_SIZE)
 
-        for _, item in ElementTree.iterparse(source_path):
-            if item.tag != 'anime':
-                continue
+        for source in sources:
+            source.writer.batch_size = batch_size
 
-            if progress:
-                sys.stdout.write('\r%s - (%05d/%05d)' % (self.collection, count_updated, count_total))
-                sys.stdout.flush()
+        # Map source file into memory
+        mapped = MappedSource(source_path).open()
 
-            count_total += 1
+        try:
+            if sources[0].param('only'):
+                # Select nodes (for targeted rebuilds)
+                nodes = cls.prepare_selection(sources, mapped)
 
-            # Process item
-            success, updated = self.process_one(item)
+                if nodes is None:
+                    return False
+            else:
+                # Prepare digest indices (for incremental updates)
+                cls.prepare_digests(sources, mapped)
 
-            if not success:
-                continue
+                nodes = mapped.iter_elements()
 
-            if updated:
-                count_updated += 1
+            # Process items (with a single pass over the source file)
+            cls.process_nodes(sources, source_path, nodes)
+        finally:
+            mapped.close()
 
         if progress:
             sys.stdout.write('\n')
 
+        # Flush pending metadata writes
+        for source in sources:
+            source.flush_metadata()
+
+        # Save digest indices
+        for source in sources:
+            if not source.digests:
+                continue
+
+            # Ensure items are processed again on the next run (if any writes failed)
+            if source.writer.count_failed:
+                log.warn(
+                    '[%-5s] Unable to update %d item(s), digest index won\'t be saved',
+                    source.collection.source, source.writer.count_failed
+                )
+                continue
+
+            source.digests.save()
+
         return True
 
+    @classmethod
+    def process_nodes(cls, sources, source_path, nodes):
+        progress = sources[0].param('progress')
+
+        # Start parser workers (processes are forked before any prefetch threads are started)
+        pool = cls.start_pool(sources)
+
+        # Start metadata prefetcher
+        prefetcher = cls.start_prefetcher(sources, source_path)
+
+        try:
+            for node, parsed in cls.iter_parsed(sources, nodes, pool):
+                if progress:
+                    cls.write_progress(sources)
+
+                accepted = False
+
+                for source, items in zip(sources, parsed):
+                    source.count_total += 1
+
+                    # Ensure item has changed since the previous run
+                    if not source.accepts(node):
+                        if source.digests:
+                            source.digests.commit(node)
+
+                        continue
+
+                    accepted = True
+
+                    # Process item
+                    success, updated, retry = source.process_one(node, items)
+
+                    if not success:
+                        continue
+
+                    if updated:
+                        source.count_updated += 1
+
+                    # Ensure items that failed temporarily are processed again on the next run
+                    if source.digests and not retry:
+                        source.digests.commit(node)
+
+                # Advance prefetcher (only accepted nodes are counted in the read-ahead window)
+                if prefetcher and accepted:
+                    prefetcher.advance()
+        finally:
+            if pool:
+                pool.stop()
+
+            # Stop prefetcher last (raises exits requested by service workers)
+            if prefetcher:
+                prefetcher.stop()
+
+    @staticmethod
+    def configure_backend(source):
+        try:
+            XmlBackend.configure(source.param('xml-backend'))
+        except ValueError as ex:
+            log.error('Invalid value provided for the "--anidb-xml-backend" parameter - %s', ex)
+            return False
+
+        return True
+
+    @staticmethod
+    def configure_cache(source):
+        path = source.param('cache')
+
+        if path and path.lower() in ['0', 'false', 'no', 'off', 'none']:
+            MetadataCache.configure(enabled=False)
+            return
+
+        MetadataCache.configure(
+            path=path,
+            ttl=try_convert(source.param('cache-ttl'), int),
+            negative_ttl=try_convert(source.param('cache-negative-ttl'), int),
+            max_entries=try_convert(source.param('cache-size'), int)
+        )
+
+    @staticmethod
+    def configure_transport(source):
+        HttpTransport.configure(
+            pool_size=try_convert(source.param('http-pool-size'), int),
+            retries=try_convert(source.param('http-retries'), int),
+            timeout=try_convert(source.param('http-timeout'), float)
+        )
+
+    @staticmethod
+    def configure_identifiers(source):
+        movies = source.param('tmdb-movie-ids')
+        shows = source.param('tmdb-show-ids')
+
+        for path in [movies, shows]:
+            if path and not os.path.exists(path):
+                log.error('Path %r doesn\'t exist', path)
+                return False
+
+        try:
+            TMDbIdentifiers.configure(movies, shows)
+        except (IOError, OSError) as ex:
+            log.error('Unable to load TMDb identifier exports - %s', ex)
+            return False
+
+        return True
+
+    @staticmethod
+    def configure_fixtures(source):
+        path = source.param('fixtures')
+
+        if path and not os.path.exists(path) and source.param('fixtures-mode') != 'record':
+            log.error('Path %r doesn\'t exist', path)
+            return False
+
+        try:
+            FixtureStore.configure(path, source.param('fixtures-mode') or 'replay')
+        except ValueError as ex:
+            log.error('Invalid value provided for the "--anidb-fixtures" parameter - %s', ex)
+            return False
+
+        return True
+
+    @classmethod
+    def prepare_digests(cls, sources, mapped):
+        directory = sources[0].param('digests')
+
+        if not directory:
+            return
+
+        # Open digest indices
+        for source in sources:
+            source.digests = DigestIndex.open(directory, source.collection)
+
+        # Calculate digests of the current source file
+        digests = scan_digests(mapped.path, mapped)
+
+        for source in sources:
+            source.digests.prepare(digests)
+
+    @staticmethod
+    def prepare_selection(sources, mapped):
+        try:
+            selectors = parse_selectors(sources[0].param('only'))
+        except ValueError as ex:
+            log.error('Invalid value provided for the "--anidb-only" parameter - %s', ex)
+            return None
+
+        # Build identifier index
+        index = IdentifierIndex.build(mapped.path, mapped)
+
+        # Resolve selected nodes (and merge groups) for each collection
+        offsets = set()
+
+        for source in sources:
+            source.selection = Selection(index, source.collection.source).resolve(selectors)
+
+            offsets.update(source.selection.offsets)
+
+        log.info('Selected %d item(s) for update', len(offsets))
+        return [mapped.element_at(offset) for offset in sorted(offsets)]
+
+    @staticmethod
+    def start_prefetcher(sources, source_path):
+        lookahead = try_convert(sources[0].param('prefetch'), int, 0)
+
+        if lookahead < 1:
+            return None
+
+        def accepts(attrib):
+            node = ElementTree.Element('anime', attrib)
+
+            return any([source.accepts(node) for source in sources])
+
+        return Prefetcher(
+            [source.collection for source in sources], source_path,
+            lookahead=lookahead,
+            accepts=accepts
+        ).start()
+
+    @staticmethod
+    def start_pool(sources):
+        workers = try_convert(sources[0].param('workers'), int, 0)
+
+        if workers < 1:
+            return None
+
+        # Workers parse nodes and hash records, items are constructed by the main process
+        # (unpickling constructed items costs more than constructing them)
+        return ParserPool([source.collection for source in sources], workers).start()
+
+    @classmethod
+    def iter_parsed(cls, sources, nodes, pool=None):
+        if pool is not None:
+            # Parse items with a pool of worker processes
+            for node, parsed in pool.parse(nodes, lambda node: [source.accepts(node) for source in sources]):
+                yield node, parsed
+
+            return
+
+        # Parse items for all collections (node is only extracted once)
+        for node in nodes:
+            collections = [
+                source.collection if source.accepts(node) else None
+                for source in sources
+            ]
+
+            if not any(collections):
+                # Node hasn't changed, skip parsing
+                yield node, collections
+                continue
+
+            yield node, Parser.parse_many(collections, node.parse())
+
+    @staticmethod
+    def write_progress(sources):
+        sys.stdout.write('\r' + ', '.join([
+            '%s - (%05d/%05d)' % (source.collection, source.count_updated, source.count_total)
+            for source in sources
+        ]))
+        sys.stdout.flush()
+
+    def accepts(self, node):
+        if self.selection is not None and node not in self.selection:
+            return False
+
+        if self.digests is None:
+            return True
+
+        return self.digests.changed(node)
+
     @Elapsed.track
-    def process_one(self, node):
+    def process_one(self, node, items=None):
         updated = False
+        retry = False
+
+        if items is None:
+            items = Parser.parse_records(self.collection, node)
 
-        for item in Parser.parse(self.collection, node):
+        for item in items:
             # Update item (if not already stored)
-            i_success, i_updated = self.update(self.collection.source, self.collection.target, node, item)
+            i_success, i_updated, i_retry = self.update(self.collection.source, self.collection.target, node, item)
 
             # Update state
             updated |= i_updated
+            retry |= i_retry
 
             if not i_success:
                 # Error detected, stop processing of item
-                return False, updated
+                return False, updated, retry
 
         # Invalid item for collection
-        return True, updated
+        return True, updated, retry
 
     @Elapsed.track
     def update(self, source, target, node, item):
@@ -123,48 +523,45 @@ class AniDB(Source):
 
         # Update items
         updated = False
+        retry = False
 
         for service_key in key.split(','):
             if service_key == 'unknown':
                 continue
 
             # Update item identifiers
-            item.identifiers[source] = service_key
+            record = item
+
+            if record.identifiers.get(source) != service_key:
+                record = item.copy({source: service_key})
 
             # Process item update
-            i_success, i_updated = self.update_one(source, service_key, hash_key, item)
+            i_success, i_updated, i_retry = self.update_one(source, service_key, hash_key, record)
+
+            retry |= i_retry
 
             if not i_success:
-                return False, i_updated
+                return False, i_updated, retry
 
             updated |= i_updated
 
-        return True, updated
+        return True, updated, retry
 
     @Elapsed.track
     def update_one(self, service, service_key, hash_key, item):
         # Construct hash of `item`
-        hash = item.hash()
+        hash = self.hash_item(item)
 
-        # Check if item has already been seen
-        if (service, service_key) in self.seen:
-            # Add item to `previous` object (and convert to "multiple" structure if needed)
-            previous = self.seen[(service, service_key)]
+        # Add item to group (items are only constructed when the group needs to be written)
+        group = self.seen.get((service, service_key))
 
-            if not previous.add(item, service):
-                return False, False
+        if group is None:
+            group = self.seen[(service, service_key)] = ItemGroup(service)
 
-            # Update `current` item
-            current = previous
-        else:
-            # Update `current` item
-            current = item
-
-            # Update seen keys
-            self.seen[(service, service_key)] = current
+        group.add(item)
 
-        # Try retrieve item metadata from collection
-        metadata = self.collection.get(service_key)
+        # Try retrieve item metadata from collection (or pending writes)
+        metadata = self.writer.get(service_key)
 
         if metadata:
             # Ensure `item` doesn't match metadata (already up to date)
@@ -173,23 +570,53 @@ class AniDB(Source):
             elif metadata.hashes.get(hash_key) == hash:
                 # Ensure no duplicate hashes exist
                 if len(metadata.hashes) == len(set(metadata.hashes.values())):
-                    return True, False
+                    return True, False, item.retry
             elif hash_key in metadata.hashes:
                 log.debug('Updating item: %s/%s (%r != %r)', service, service_key, metadata.hashes[hash_key], hash)
-        else:
-            # Construct new index item
-            metadata = self.collection.index.create(service_key)
 
-            # Update index
-            self.collection.set(service_key, metadata)
+        # Construct `current` item from group
+        success, current, retry = self.construct_group(group)
+
+        if not success:
+            return False, False, retry
+
+        if current is None:
+            # No valid items available
+            return True, False, retry
+
+        if not metadata:
+            # Construct new index item
+            metadata = self.create_metadata(service, service_key)
 
         # Mark item as updated
         self.updated[(service, service_key)] = True
 
         # Update item
-        # log.debug('[%-5s] Updating item: %r (revision: %r)', service, service_key, metadata.revision)
+        self.write_metadata(service, service_key, metadata, current, hash_key, hash)
+        return True, True, retry
 
-        if not metadata.update(current, hash_key, hash):
-            log.warn('[%-5s] Unable to update item: %r', service, service_key)
+    @Elapsed.track
+    def construct_group(self, group):
+        return group.construct()
+
+    @Profiler.stage('hash')
+    @Elapsed.track
+    def hash_item(self, item):
+        return item.hash()
+
+    @Profiler.stage('write')
+    @Elapsed.track
+    def create_metadata(self, service, service_key):
+        # Construct new index item (stored in the collection when writes are flushed)
+        return self.writer.create(service, service_key)
+
+    @Profiler.stage('write')
+    @Elapsed.track
+    def write_metadata(self, service, service_key, metadata, current, hash_key, hash):
+        # Queue item update (written to the collection in batches)
+        return self.writer.write(service, service_key, metadata, current, hash_key, hash)
 
-        return True, True
+    @Profiler.stage('write')
+    @Elapsed.track
+    def flush_metadata(self):
+        return self.writer.flush()
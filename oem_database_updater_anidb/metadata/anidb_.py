@@ -1,22 +1,73 @@
-from appdirs import AppDirs
-import anidb
+from oem_framework.core.elapsed import Elapsed
+from oem_framework.core.helpers import try_convert
+from oem_database_updater_anidb.metadata.core.base import Metadata
+from oem_database_updater_anidb.metadata.core.limiter import TokenBucket
+from oem_database_updater_anidb.metadata.core.transport import HttpTransport
+
 import logging
 import os
+import threading
 
 log = logging.getLogger(__name__)
 
 
-class AniDbMetadata(object):
+class AniDbSummary(object):
+    __slots__ = ['episodes']
+
+    def __init__(self, episodes=0):
+        # Bitset of episode numbers
+        self.episodes = episodes
+
+    @classmethod
+    def build(cls, item):
+        if item is None or isinstance(item, cls):
+            return item
+
+        episodes = 0
+
+        for number in item.episodes:
+            number = try_convert(number, int)
+
+            if number is None or number < 1:
+                continue
+
+            episodes |= 1 << number
+
+        return cls(episodes)
+
+    def __contains__(self, number):
+        return number > 0 and bool((self.episodes >> number) & 1)
+
+    def __getstate__(self):
+        return self.episodes
+
+    def __setstate__(self, state):
+        self.episodes = state
+
+    def __repr__(self):
+        return '<AniDbSummary episodes: 0x%x>' % self.episodes
+
+
+class AniDbMetadata(Metadata):
+    __key__ = 'anidb'
+
     constructed = False
 
     client = None
     cache = {}
 
+    limiter = TokenBucket(0.5, 1)
+    semaphore = threading.BoundedSemaphore(1)
+
     @classmethod
     def _construct(cls):
         if cls.constructed:
             return
 
+        # Import client on first use (reduces startup time)
+        from appdirs import AppDirs
+        import anidb
+
         dirs = AppDirs('oem-updater', 'OpenEntityMap')
 
         # Ensure directories exist
@@ -26,35 +77,51 @@ class AniDbMetadata(object):
         # Construct client
         cls.client = anidb.Anidb(cache=dirs.user_cache_dir, rate_limit=5)
 
+        # Use shared transport settings (pooled connections)
+        if getattr(cls.client, 'session', None) is not None:
+            HttpTransport.attach(cls.client.session)
+
         # Mark as constructed
         cls.constructed = True
 
+    @classmethod
+    def encode(cls, value):
+        if value is None:
+            return None
+
+        return value.episodes
+
+    @classmethod
+    def decode(cls, data):
+        if data is None:
+            return None
+
+        return AniDbSummary(int(data))
+
     @classmethod
     def fetch(cls, anidb_id):
+        return cls.request(anidb_id, cls._fetch, anidb_id)
+
+    @classmethod
+    @Elapsed.track
+    def _fetch(cls, anidb_id):
         # Ensure client is constructed
         cls._construct()
 
-        # Check if metadata has been cached
-        if anidb_id in cls.cache:
-            return cls.cache[anidb_id]
-
         # Fetch anidb metadata
         try:
             item = cls.client.anime(anidb_id)
         except Exception as ex:
             log.warn('Unable to retrieve %r from anidb.net - %s', anidb_id, ex, exc_info=True)
-            cls.cache[anidb_id] = None
-            return None
+            return cls.set_cached(anidb_id, None, persist=False)
 
         if not item:
             log.warn('Unable to find %r on anidb.net', anidb_id)
-            cls.cache[anidb_id] = None
-            return None
+            return cls.set_cached(anidb_id, None)
 
         if item._xml.tag == "error":
             log.error('Error returned from anidb.net: %s', item._xml.text)
             exit(1)
 
-        # Cache anidb metadata
-        cls.cache[anidb_id] = item
-        return item
+        # Cache anidb metadata summary
+        return cls.set_cached(anidb_id, AniDbSummary.build(item))
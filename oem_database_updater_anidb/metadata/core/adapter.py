@@ -0,0 +1,21 @@
+from requests.adapters import HTTPAdapter
+
+
+class PooledAdapter(HTTPAdapter):
+    __attrs__ = HTTPAdapter.__attrs__ + ['timeout']
+
+    def __init__(self, timeout=None, **kwargs):
+        self.timeout = timeout
+
+        super(PooledAdapter, self).__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        # Keep connections alive (some clients request "Connection: close" on every request)
+        if request.headers.get('Connection', '').lower() == 'close':
+            request.headers['Connection'] = 'keep-alive'
+
+        # Apply default timeout (if one wasn't provided with the request)
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+
+        return super(PooledAdapter, self).send(request, **kwargs)
@@ -0,0 +1,152 @@
+from oem_database_updater_anidb.core.profiler import Profiler
+from oem_database_updater_anidb.metadata.core.cache import MetadataCache
+from oem_database_updater_anidb.metadata.core.fixtures import FixtureStore
+
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+
+class Metadata(object):
+    __key__ = None
+
+    cache = None
+
+    limiter = None
+    semaphore = None
+
+    lock = threading.Lock()
+    pending = {}
+
+    errors = set()
+
+    @classmethod
+    @Profiler.stage('fetch')
+    def request(cls, key, func, *args):
+        fixtures = FixtureStore.current()
+
+        # Serve metadata from fixtures (if enabled)
+        if fixtures.replay:
+            return cls.replay(fixtures, key)
+
+        # Check if metadata has been cached
+        hit, value = cls.get_cached(key)
+
+        if hit:
+            return value
+
+        # Check if a request for `key` is already in progress
+        with cls.lock:
+            event = cls.pending.get((cls.__key__, key))
+
+            if event is None:
+                event = cls.pending[(cls.__key__, key)] = threading.Event()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            # Wait for the in-progress request to complete
+            event.wait()
+
+            _, value = cls.get_cached(key)
+            return value
+
+        # Fetch metadata
+        try:
+            return cls.throttle(func, *args)
+        finally:
+            with cls.lock:
+                del cls.pending[(cls.__key__, key)]
+
+            event.set()
+
+    @classmethod
+    def replay(cls, fixtures, key):
+        # Check if metadata has been replayed
+        if key in cls.cache:
+            return cls.cache[key]
+
+        # Retrieve metadata from fixtures
+        hit, data = fixtures.get(cls.__key__, key)
+
+        if not hit:
+            log.warn('No fixture available for %s/%r', cls.__key__, key)
+            return cls.set_cached(key, None, persist=False)
+
+        return cls.set_cached(key, cls.decode(data), persist=False)
+
+    @classmethod
+    def throttle(cls, func, *args):
+        # Limit concurrent requests
+        if cls.semaphore is not None:
+            cls.semaphore.acquire()
+
+        try:
+            # Limit request rate
+            if cls.limiter is not None:
+                cls.limiter.acquire()
+
+            return func(*args)
+        finally:
+            if cls.semaphore is not None:
+                cls.semaphore.release()
+
+    @classmethod
+    def get_cached(cls, key):
+        # Check if metadata has been cached in memory
+        if key in cls.cache:
+            return True, cls.cache[key]
+
+        # Check if metadata has been stored in the persistent cache
+        hit, value = MetadataCache.current().get(cls.__key__, key)
+
+        if hit:
+            cls.cache[key] = value
+
+            # Record metadata retrieved from the persistent cache (if enabled)
+            cls.record(key, value)
+
+        return hit, value
+
+    @classmethod
+    def set_cached(cls, key, value, persist=True):
+        cls.cache[key] = value
+
+        # Track temporary failures (missing values that aren't persisted)
+        if not persist and value is None:
+            cls.errors.add((cls.__key__, key))
+        else:
+            cls.errors.discard((cls.__key__, key))
+
+        # Store metadata in the persistent cache (and record fixture, if enabled)
+        if persist:
+            MetadataCache.current().set(cls.__key__, key, value)
+            cls.record(key, value)
+
+        return value
+
+    @classmethod
+    def record(cls, key, value):
+        fixtures = FixtureStore.current()
+
+        if not fixtures.record:
+            return False
+
+        return fixtures.set(cls.__key__, key, cls.encode(value))
+
+    @classmethod
+    def encode(cls, value):
+        # Convert `value` into fixture data (only containing JSON types)
+        return value
+
+    @classmethod
+    def decode(cls, data):
+        # Convert fixture data into a cached value
+        return data
+
+    @classmethod
+    def failed(cls, key):
+        # Check if the request for `key` failed temporarily (or didn't complete)
+        return key not in cls.cache or (cls.__key__, key) in cls.errors
@@ -0,0 +1,214 @@
+from six.moves import cPickle as pickle
+import logging
+import os
+import six
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_NEGATIVE_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 200000
+
+
+class MetadataCache(object):
+    instance = None
+    options = {}
+
+    def __init__(self, path, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self._connection = None
+        self._pid = None
+
+        self._lock = threading.RLock()
+        self._writes = 0
+
+    @classmethod
+    def configure(cls, path=None, ttl=None, negative_ttl=None, max_entries=None, enabled=True):
+        cls.options = {
+            'path': path,
+            'ttl': ttl,
+            'negative_ttl': negative_ttl,
+            'max_entries': max_entries,
+            'enabled': enabled
+        }
+
+        # Close current cache
+        if cls.instance is not None:
+            cls.instance.close()
+            cls.instance = None
+
+    @classmethod
+    def current(cls):
+        if cls.instance is not None:
+            return cls.instance
+
+        if not cls.options.get('enabled', True):
+            cls.instance = DisabledCache()
+            return cls.instance
+
+        # Retrieve cache path
+        path = cls.options.get('path')
+
+        if not path:
+            from appdirs import AppDirs
+
+            path = os.path.join(AppDirs('oem-updater', 'OpenEntityMap').user_cache_dir, 'anidb-metadata.db')
+
+        # Construct cache
+        kwargs = dict([
+            (key, value) for key, value in cls.options.items()
+            if key in ['ttl', 'negative_ttl', 'max_entries'] and value is not None
+        ])
+
+        cls.instance = cls(path, **kwargs)
+        return cls.instance
+
+    @property
+    def connection(self):
+        # Re-open connection in forked processes
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+
+        directory = os.path.dirname(self.path)
+
+        # Ensure directory exists
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Open database
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA synchronous = OFF')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            '  namespace TEXT NOT NULL,'
+            '  key TEXT NOT NULL,'
+            '  value BLOB,'
+            '  expires_at REAL NOT NULL,'
+            '  PRIMARY KEY (namespace, key)'
+            ')'
+        )
+        self._connection.execute('CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)')
+
+        self._pid = os.getpid()
+
+        # Remove expired entries
+        self._connection.execute('DELETE FROM entries WHERE expires_at < ?', (time.time(),))
+        return self._connection
+
+    def get(self, namespace, key):
+        with self._lock:
+            try:
+                row = self.connection.execute(
+                    'SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?',
+                    (namespace, self.encode_key(key))
+                ).fetchone()
+            except sqlite3.Error as ex:
+                log.warn('Unable to read %s/%s from the metadata cache - %s', namespace, key, ex)
+                return False, None
+
+        if row is None:
+            return False, None
+
+        value, expires_at = row
+
+        # Ensure entry hasn't expired
+        if expires_at < time.time():
+            return False, None
+
+        # Negative result
+        if value is None:
+            return True, None
+
+        # Decode value
+        try:
+            return True, pickle.loads(bytes(value))
+        except Exception as ex:
+            log.debug('Unable to decode %s/%s from the metadata cache - %s', namespace, key, ex)
+            return False, None
+
+    def set(self, namespace, key, value):
+        if value is None:
+            ttl = self.negative_ttl
+            data = None
+        else:
+            ttl = self.ttl
+
+            # Encode value
+            try:
+                data = sqlite3.Binary(pickle.dumps(value, 2))
+            except Exception as ex:
+                log.debug('Unable to encode %s/%s for the metadata cache - %s', namespace, key, ex)
+                return False
+
+        if ttl <= 0:
+            return False
+
+        with self._lock:
+            try:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)',
+                    (namespace, self.encode_key(key), data, time.time() + ttl)
+                )
+            except sqlite3.Error as ex:
+                log.warn('Unable to write %s/%s to the metadata cache - %s', namespace, key, ex)
+                return False
+
+            # Evict entries (if the cache has grown too large)
+            self._writes += 1
+
+            if self._writes >= max(1, self.max_entries // 100):
+                self.evict()
+
+        return True
+
+    def evict(self):
+        with self._lock:
+            self._writes = 0
+
+            count, = self.connection.execute('SELECT COUNT(*) FROM entries').fetchone()
+
+            if count <= self.max_entries:
+                return 0
+
+            # Remove entries closest to expiry
+            self.connection.execute(
+                'DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries ORDER BY expires_at LIMIT ?)',
+                (count - self.max_entries,)
+            )
+
+            log.debug('Evicted %d entries from the metadata cache', count - self.max_entries)
+            return count - self.max_entries
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+
+            self._connection = None
+            self._pid = None
+
+    @staticmethod
+    def encode_key(key):
+        if type(key) is tuple:
+            return '/'.join([six.text_type(k) for k in key])
+
+        return six.text_type(key)
+
+
+class DisabledCache(object):
+    def get(self, namespace, key):
+        return False, None
+
+    def set(self, namespace, key, value):
+        return False
+
+    def close(self):
+        pass
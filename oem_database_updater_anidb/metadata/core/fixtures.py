@@ -0,0 +1,148 @@
+import io
+import json
+import logging
+import os
+import re
+import six
+import threading
+import zipfile
+
+log = logging.getLogger(__name__)
+
+RE_UNSAFE_CHARACTERS = re.compile(r'[^\w.-]+')
+
+# Version of the fixture format (fixtures only contain data, see `Metadata.encode`)
+VERSION = 1
+
+
+class FixtureStore(object):
+    instance = None
+
+    def __init__(self, path, mode='replay'):
+        if mode not in ['record', 'replay']:
+            raise ValueError('Unknown fixture mode: %r' % (mode,))
+
+        self.path = path
+        self.mode = mode
+
+        self.archive = None
+        self.lock = threading.Lock()
+
+        if zipfile.is_zipfile(path):
+            if mode == 'record':
+                raise ValueError('Fixtures can only be recorded to a directory')
+
+            self.archive = zipfile.ZipFile(path, 'r')
+
+    @property
+    def record(self):
+        return self.mode == 'record'
+
+    @property
+    def replay(self):
+        return self.mode == 'replay'
+
+    @classmethod
+    def configure(cls, path=None, mode='replay'):
+        if cls.instance is not None:
+            cls.instance.close()
+
+        if not path:
+            cls.instance = None
+            return None
+
+        cls.instance = cls(path, mode)
+
+        log.info('Metadata fixtures configured: %r (mode: %s)', path, mode)
+        return cls.instance
+
+    @classmethod
+    def current(cls):
+        if cls.instance is None:
+            return DisabledStore()
+
+        return cls.instance
+
+    def get(self, namespace, key):
+        name = self.encode_name(namespace, key)
+
+        try:
+            with self.lock:
+                if self.archive is not None:
+                    data = self.archive.read(name)
+                else:
+                    with io.open(os.path.join(self.path, name), 'rb') as fp:
+                        data = fp.read()
+        except (IOError, KeyError):
+            return False, None
+
+        return True, self.decode(name, data)
+
+    def set(self, namespace, key, value):
+        if not self.record:
+            return False
+
+        path = os.path.join(self.path, self.encode_name(namespace, key))
+
+        # Encode value
+        try:
+            data = self.encode(value)
+        except Exception as ex:
+            log.warn('Unable to record fixture for %s/%s - %s', namespace, key, ex)
+            return False
+
+        with self.lock:
+            directory = os.path.dirname(path)
+
+            # Ensure directory exists
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+            # Write fixture
+            with io.open(path, 'wb') as fp:
+                fp.write(data)
+
+        return True
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+    @staticmethod
+    def encode(value):
+        return json.dumps({'version': VERSION, 'value': value}, sort_keys=True).encode('utf-8')
+
+    @staticmethod
+    def decode(name, data):
+        try:
+            fixture = json.loads(data.decode('utf-8'))
+        except ValueError as ex:
+            raise ValueError('Invalid fixture %r - %s' % (name, ex))
+
+        # Reject fixtures recorded in an unknown format
+        if type(fixture) is not dict or fixture.get('version') != VERSION:
+            raise ValueError('Unsupported fixture format for %r (expected version %d)' % (name, VERSION))
+
+        return fixture.get('value')
+
+    @staticmethod
+    def encode_name(namespace, key):
+        if type(key) is not tuple:
+            key = (key,)
+
+        return '/'.join([
+            RE_UNSAFE_CHARACTERS.sub('_', namespace),
+            RE_UNSAFE_CHARACTERS.sub('_', '-'.join([six.text_type(k) for k in key])) + '.json'
+        ])
+
+
+class DisabledStore(object):
+    record = False
+    replay = False
+
+    def get(self, namespace, key):
+        return False, None
+
+    def set(self, namespace, key, value):
+        return False
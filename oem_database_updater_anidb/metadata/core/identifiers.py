@@ -0,0 +1,93 @@
+from array import array
+from bisect import bisect_left
+import gzip
+import io
+import logging
+import re
+
+log = logging.getLogger(__name__)
+
+RE_IDENTIFIER = re.compile(br'"id"\s*:\s*(\d+)')
+
+
+class IdentifierSet(object):
+    __slots__ = ['ids']
+
+    def __init__(self, ids=None):
+        self.ids = array('i', sorted(set(ids or [])))
+
+    @classmethod
+    def load(cls, path):
+        if path.endswith('.gz'):
+            fp = gzip.open(path, 'rb')
+        else:
+            fp = io.open(path, 'rb')
+
+        try:
+            return cls(cls.iter_identifiers(fp))
+        finally:
+            fp.close()
+
+    @staticmethod
+    def iter_identifiers(fp):
+        # Match identifiers with a regular expression (decoding each line as json is much slower)
+        for line in fp:
+            match = RE_IDENTIFIER.search(line)
+
+            if not match:
+                continue
+
+            yield int(match.group(1))
+
+    @property
+    def maximum(self):
+        if not self.ids:
+            return None
+
+        return self.ids[-1]
+
+    def __contains__(self, value):
+        i = bisect_left(self.ids, value)
+
+        return i < len(self.ids) and self.ids[i] == value
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class TMDbIdentifiers(object):
+    indices = {}
+
+    @classmethod
+    def configure(cls, movies=None, shows=None):
+        cls.indices = {}
+
+        for media, path in [('movie', movies), ('show', shows)]:
+            if not path:
+                continue
+
+            index = cls.indices[media] = IdentifierSet.load(path)
+
+            log.info('Loaded %d TMDb %s identifiers from %r', len(index), media, path)
+
+    @classmethod
+    def enabled(cls, media):
+        return media in cls.indices
+
+    @classmethod
+    def contains(cls, media, tmdb_id):
+        index = cls.indices.get(media)
+
+        if index is None:
+            return None
+
+        try:
+            tmdb_id = int(tmdb_id)
+        except (TypeError, ValueError):
+            return None
+
+        # Identifiers created after the export was generated can't be validated
+        if index.maximum is None or tmdb_id > index.maximum:
+            return None
+
+        return tmdb_id in index
@@ -0,0 +1,32 @@
+import threading
+import time
+
+
+class TokenBucket(object):
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = capacity
+
+        self.tokens = capacity
+        self.updated_at = time.time()
+
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                # Refill bucket
+                now = time.time()
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                # Consume tokens (if available)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                # Calculate time until enough tokens are available
+                delay = (tokens - self.tokens) / self.rate
+
+            time.sleep(delay)
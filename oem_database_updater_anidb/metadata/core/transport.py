@@ -0,0 +1,102 @@
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 2
+DEFAULT_TIMEOUT = 30
+
+HEADERS = {
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive'
+}
+
+
+class HttpTransport(object):
+    session = None
+    sessions = []
+
+    options = {}
+
+    lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, pool_connections=None, pool_size=None, retries=None, timeout=None):
+        cls.options = {
+            'pool_connections': pool_connections,
+            'pool_size': pool_size,
+            'retries': retries,
+            'timeout': timeout
+        }
+
+        # Update adapters of existing sessions (clients keep references to their sessions)
+        with cls.lock:
+            for session in cls.sessions:
+                cls.mount(session)
+
+    @classmethod
+    def current(cls):
+        if cls.session is not None:
+            return cls.session
+
+        # Import requests on first use (reduces startup time)
+        import requests
+
+        with cls.lock:
+            if cls.session is None:
+                cls.session = cls.attach(requests.Session())
+
+        return cls.session
+
+    @classmethod
+    def attach(cls, session):
+        cls.mount(session)
+
+        # Request compressed, persistent connections
+        session.headers.update(HEADERS)
+
+        if session not in cls.sessions:
+            cls.sessions.append(session)
+
+        log.debug('Attached pooled transport to %r', session)
+        return session
+
+    @classmethod
+    def mount(cls, session):
+        adapter = cls.create_adapter()
+
+        previous = set([
+            session.adapters.get(prefix)
+            for prefix in ['http://', 'https://']
+        ])
+
+        # Mount pooled adapter (connections are kept alive between requests to each host)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        # Close connections of replaced adapters
+        for value in previous:
+            if value is not None:
+                value.close()
+
+    @classmethod
+    def create_adapter(cls):
+        from oem_database_updater_anidb.metadata.core.adapter import PooledAdapter
+
+        return PooledAdapter(
+            timeout=cls.option('timeout', DEFAULT_TIMEOUT),
+            pool_connections=cls.option('pool_connections', DEFAULT_POOL_CONNECTIONS),
+            pool_maxsize=cls.option('pool_size', DEFAULT_POOL_SIZE),
+            max_retries=cls.option('retries', DEFAULT_RETRIES)
+        )
+
+    @classmethod
+    def option(cls, key, default=None):
+        value = cls.options.get(key)
+
+        if value is None:
+            return default
+
+        return value
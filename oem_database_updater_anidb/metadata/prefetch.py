@@ -0,0 +1,182 @@
+from oem_database_updater_anidb.constants import COLLECTION_KEYS_TMDB, COLLECTION_KEYS_TVDB
+from oem_database_updater_anidb.core.scanner import iter_attributes
+from oem_database_updater_anidb.metadata.anidb_ import AniDbMetadata
+from oem_database_updater_anidb.metadata.core.identifiers import TMDbIdentifiers
+from oem_database_updater_anidb.metadata.tmdb_ import TMDbMetadata
+from oem_database_updater_anidb.metadata.tvdb_ import TVDbMetadata
+
+from six.moves import queue
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+SERVICES = {
+    'anidb': (AniDbMetadata, 1),
+    'tmdb': (TMDbMetadata, 4),
+    'tvdb': (TVDbMetadata, 1)
+}
+
+
+class Prefetcher(object):
+    def __init__(self, collections, source_path, lookahead=64, accepts=None, use_absolute_mapper=True):
+        self.keys = [(collection.source, collection.target) for collection in collections]
+        self.source_path = source_path
+
+        self.lookahead = lookahead
+        self.accepts = accepts
+        self.use_absolute_mapper = use_absolute_mapper
+
+        self.window = threading.Semaphore(lookahead)
+        self.queues = dict([(key, queue.Queue()) for key in SERVICES])
+
+        self.submitted = set()
+        self.stopped = threading.Event()
+
+        self.exit = None
+
+        self.threads = []
+
+    def start(self):
+        # Start scanner
+        self.threads.append(self._spawn(self.run_scanner))
+
+        # Start service workers
+        for key, (_, concurrency) in SERVICES.items():
+            for _ in range(concurrency):
+                self.threads.append(self._spawn(self.run_worker, key))
+
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+        # Release any waiting threads
+        self.window.release()
+
+        for q in self.queues.values():
+            for _ in range(len(self.threads)):
+                q.put(None)
+
+        for thread in self.threads:
+            thread.join()
+
+        self.threads = []
+
+        # Propagate exits requested after the last node was advanced
+        self.raise_exit()
+
+    def advance(self):
+        # Propagate exits requested by service workers (e.g. AniDB bans)
+        self.raise_exit()
+
+        # Allow the scanner to read another accepted node
+        self.window.release()
+
+    def raise_exit(self):
+        if self.exit is None:
+            return
+
+        # Only raise each exit once (`stop()` is called after `advance()` has raised)
+        exit, self.exit = self.exit, None
+        raise exit
+
+    def run_scanner(self):
+        try:
+            for _, attrib in iter_attributes(self.source_path):
+                # Ignore nodes that won't be processed (not counted in the read-ahead window)
+                if self.accepts is not None and not self.accepts(attrib):
+                    continue
+
+                # Wait until the node is within the read-ahead window
+                self.window.acquire()
+
+                if self.stopped.is_set():
+                    return
+
+                for service, key in self.get_requests(attrib):
+                    self.submit(service, key)
+        except Exception as ex:
+            log.warn('Metadata prefetch scanner failed - %s', ex, exc_info=True)
+
+    def run_worker(self, service):
+        metadata, _ = SERVICES[service]
+
+        while not self.stopped.is_set():
+            key = self.queues[service].get()
+
+            if key is None:
+                return
+
+            # Fetch metadata (stored in the metadata cache)
+            try:
+                if service == 'tmdb':
+                    metadata.fetch(key[1], key[0])
+                else:
+                    metadata.fetch(key)
+            except SystemExit as ex:
+                # Stop prefetching, exit is raised on the main thread by `advance()` or `stop()`
+                self.exit = ex
+                self.stopped.set()
+                return
+            except Exception as ex:
+                log.debug('Unable to prefetch %s/%r - %s', service, key, ex)
+
+    def submit(self, service, key):
+        if (service, key) in self.submitted:
+            return
+
+        self.submitted.add((service, key))
+
+        # Ignore keys that have already been cached
+        metadata, _ = SERVICES[service]
+
+        if key in metadata.cache:
+            return
+
+        self.queues[service].put(key)
+
+    def get_requests(self, attrib):
+        if attrib.get('defaulttvdbseason') is None:
+            return
+
+        anidb_id = attrib.get('anidbid')
+
+        if not anidb_id or ',' in anidb_id:
+            return
+
+        for source, target in self.keys:
+            # TMDb collections (see `TMDbParser.parse_one`)
+            if source in COLLECTION_KEYS_TMDB or target in COLLECTION_KEYS_TMDB:
+                for media, name in [('movie', 'tmdbmid'), ('show', 'tmdbsid')]:
+                    for tmdb_id in self.get_identifiers(attrib, name):
+                        yield 'anidb', anidb_id
+
+                        # Ignore identifiers validated by the local TMDb export
+                        if TMDbIdentifiers.contains(media, tmdb_id) is not None:
+                            continue
+
+                        yield 'tmdb', (media, tmdb_id)
+
+            # Absolute mappings (see `AbsoluteMapper.process`)
+            if not self.use_absolute_mapper or attrib.get('defaulttvdbseason') != 'a':
+                continue
+
+            if source in COLLECTION_KEYS_TVDB or target in COLLECTION_KEYS_TVDB:
+                for tvdb_id in self.get_identifiers(attrib, 'tvdbid'):
+                    yield 'anidb', anidb_id
+                    yield 'tvdb', int(tvdb_id)
+
+    @staticmethod
+    def get_identifiers(attrib, name):
+        return [
+            key for key in attrib.get(name, '').split(',')
+            if key and key.isdigit()
+        ]
+
+    @staticmethod
+    def _spawn(target, *args):
+        thread = threading.Thread(target=target, args=args)
+        thread.daemon = True
+        thread.start()
+        return thread
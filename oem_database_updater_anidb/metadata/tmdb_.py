@@ -1,37 +1,84 @@
+from oem_framework.core.elapsed import Elapsed
 from oem_updater.core.constants import TMDB_API_KEY
+from oem_database_updater_anidb.metadata.core.base import Metadata
+from oem_database_updater_anidb.metadata.core.limiter import TokenBucket
+from oem_database_updater_anidb.metadata.core.transport import HttpTransport
 
-from requests import HTTPError
-import tmdbsimple as tmdb
+import logging
+import threading
 
-# Configure TMDb client
-tmdb.API_KEY = TMDB_API_KEY
+log = logging.getLogger(__name__)
 
 
-class TMDbMetadata(object):
-    cache = {
-        'movie': {},
-        'show': {}
-    }
+class TMDbMetadata(Metadata):
+    __key__ = 'tmdb'
+
+    constructed = False
+
+    client = None
+    cache = {}
+
+    limiter = TokenBucket(4, 40)
+    semaphore = threading.BoundedSemaphore(4)
+
+    @classmethod
+    def _construct(cls):
+        if cls.constructed:
+            return
+
+        # Import client on first use (reduces startup time)
+        import tmdbsimple as tmdb
+
+        # Configure TMDb client
+        tmdb.API_KEY = TMDB_API_KEY
+
+        # Use shared transport (pooled connections)
+        if hasattr(tmdb, 'REQUESTS_SESSION'):
+            tmdb.REQUESTS_SESSION = HttpTransport.current()
+        else:
+            log.warn('TMDb client doesn\'t support shared sessions, requests won\'t be pooled')
+
+        cls.client = tmdb
+
+        # Mark as constructed
+        cls.constructed = True
+
+    @classmethod
+    def decode(cls, data):
+        # Only existence is stored
+        if data is None:
+            return None
+
+        return True
 
     @classmethod
     def fetch(cls, tmdb_id, media):
-        # Return item from cache (if available)
-        if tmdb_id in cls.cache[media]:
-            return cls.cache[media][tmdb_id]
+        return cls.request((media, tmdb_id), cls._fetch, tmdb_id, media)
+
+    @classmethod
+    @Elapsed.track
+    def _fetch(cls, tmdb_id, media):
+        from requests import HTTPError
+
+        # Ensure client is constructed
+        cls._construct()
 
         # Fetch item via TMDb API
         if media == 'movie':
-            item = tmdb.Movies(tmdb_id)
+            item = cls.client.Movies(tmdb_id)
         elif media == 'show':
-            item = tmdb.TV(tmdb_id)
+            item = cls.client.TV(tmdb_id)
         else:
             raise NotImplementedError('Unsupported media type: %r' % media)
 
         try:
             item.info()
-        except HTTPError:
-            item = None
+        except HTTPError as ex:
+            # Only persist "not found" errors
+            if ex.response is None or ex.response.status_code != 404:
+                return cls.set_cached((media, tmdb_id), None, persist=False)
+
+            return cls.set_cached((media, tmdb_id), None)
 
-        # Store item in cache
-        cls.cache[media][tmdb_id] = item
-        return item
+        # Store existence in cache (items are only used to validate identifiers)
+        return cls.set_cached((media, tmdb_id), True)
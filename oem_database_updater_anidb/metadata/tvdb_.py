@@ -0,0 +1,144 @@
+from oem_framework.core.elapsed import Elapsed
+from oem_framework.core.helpers import try_convert
+from oem_updater.core.constants import TVDB_API_KEY
+from oem_database_updater_anidb.metadata.core.base import Metadata
+from oem_database_updater_anidb.metadata.core.limiter import TokenBucket
+from oem_database_updater_anidb.metadata.core.transport import HttpTransport
+
+import logging
+import os
+import six
+import threading
+
+log = logging.getLogger(__name__)
+
+
+class TVDbSummary(object):
+    __slots__ = ['seasons']
+
+    def __init__(self, seasons=()):
+        # Tuple of (season number, absolute number of the first episode, episode count)
+        self.seasons = tuple(seasons)
+
+    @classmethod
+    def build(cls, item):
+        if item is None or isinstance(item, cls):
+            return item
+
+        seasons = []
+
+        for season_num, season in item.items():
+            if season_num < 1:
+                continue
+
+            # Retrieve absolute number of the first episode
+            if 1 not in season:
+                continue
+
+            absolute_num = season[1].get('absolute_number')
+
+            if not absolute_num:
+                continue
+
+            absolute_num = try_convert(absolute_num, int)
+
+            if absolute_num is None:
+                continue
+
+            # Count episodes (excluding specials)
+            episode_count = len([
+                e for e in six.itervalues(season) if e['episodenumber'] != '0'
+            ])
+
+            seasons.append((season_num, absolute_num, episode_count))
+
+        return cls(seasons)
+
+    def __getstate__(self):
+        return self.seasons
+
+    def __setstate__(self, state):
+        self.seasons = state
+
+    def __repr__(self):
+        return '<TVDbSummary seasons: %r>' % (self.seasons,)
+
+
+class TVDbMetadata(Metadata):
+    __key__ = 'tvdb'
+
+    constructed = False
+
+    client = None
+    cache = {}
+
+    limiter = TokenBucket(5, 10)
+    semaphore = threading.BoundedSemaphore(1)
+
+    @classmethod
+    def _construct(cls):
+        if cls.constructed:
+            return
+
+        # Import client on first use (reduces startup time)
+        from appdirs import AppDirs
+        import tvdb_api
+
+        dirs = AppDirs('oem-updater', 'OpenEntityMap')
+
+        # Ensure directories exist
+        if not os.path.exists(dirs.user_cache_dir):
+            os.makedirs(dirs.user_cache_dir)
+
+        # Construct client
+        cls.client = tvdb_api.Tvdb(apikey=TVDB_API_KEY, cache=dirs.user_cache_dir, use_requests=True)
+
+        # Use shared transport settings (pooled connections)
+        if getattr(cls.client, 'session', None) is not None:
+            HttpTransport.attach(cls.client.session)
+
+        # Mark as constructed
+        cls.constructed = True
+
+    @classmethod
+    def encode(cls, value):
+        if value is None:
+            return None
+
+        return [list(season) for season in value.seasons]
+
+    @classmethod
+    def decode(cls, data):
+        if data is None:
+            return None
+
+        return TVDbSummary([tuple(season) for season in data])
+
+    @classmethod
+    def fetch(cls, tvdb_id):
+        try:
+            tvdb_id = int(tvdb_id)
+        except Exception as ex:
+            raise ValueError('Invalid value provided for "tvdb_id" - %s' % ex)
+
+        return cls.request(tvdb_id, cls._fetch, tvdb_id)
+
+    @classmethod
+    @Elapsed.track
+    def _fetch(cls, tvdb_id):
+        # Ensure client is constructed
+        cls._construct()
+
+        # Fetch tvdb metadata
+        try:
+            item = cls.client[tvdb_id]
+        except Exception as ex:
+            log.warn('Unable to retrieve %r from thetvdb - %s', tvdb_id, ex)
+            return cls.set_cached(tvdb_id, None, persist=False)
+
+        if not item:
+            log.warn('Unable to find %r on thetvdb.com', tvdb_id)
+            return cls.set_cached(tvdb_id, None)
+
+        # Cache tvdb metadata summary
+        return cls.set_cached(tvdb_id, TVDbSummary.build(item))
@@ -1,10 +1,18 @@
 from oem_database_updater_anidb.constants import COLLECTION_KEYS_IMDB, COLLECTION_KEYS_TMDB, COLLECTION_KEYS_TVDB
+from oem_database_updater_anidb.core.profiler import Profiler
 from oem_database_updater_anidb.parsers.core.base import BaseParser
+from oem_database_updater_anidb.parsers.core.records import AnimeRecord
 from oem_database_updater_anidb.parsers.imdb_ import IMDbParser
 from oem_database_updater_anidb.parsers.tmdb_ import TMDbParser
 from oem_database_updater_anidb.parsers.tvdb_ import TVDbParser
 from oem_framework.core.elapsed import Elapsed
 
+PARSERS = [
+    (COLLECTION_KEYS_IMDB, IMDbParser),
+    (COLLECTION_KEYS_TMDB, TMDbParser),
+    (COLLECTION_KEYS_TVDB, TVDbParser)
+]
+
 
 class Parser(BaseParser):
     @classmethod
@@ -20,22 +28,55 @@ class Parser(BaseParser):
             use_absolute_mapper=use_absolute_mapper
         )
 
+    @classmethod
+    def parse_records(cls, collection, node, anime=None, use_absolute_mapper=True):
+        parser = cls.get_parser(collection, node)
+
+        if not parser:
+            return []
+
+        return parser.parse_records(
+            collection, node,
+            anime=anime,
+            use_absolute_mapper=use_absolute_mapper
+        )
+
+    @classmethod
+    @Profiler.stage('record')
+    def parse_many(cls, collections, node, use_absolute_mapper=True):
+        anime = None
+
+        # Parse records for each collection (skipped collections should be provided as `None`)
+        results = []
+
+        for collection in collections:
+            if collection is None:
+                results.append(None)
+                continue
+
+            # Parse anime node (shared between collections)
+            if anime is None:
+                anime = AnimeRecord.from_node(node)
+
+            results.append(list(cls.parse_records(
+                collection, node,
+                anime=anime,
+                use_absolute_mapper=use_absolute_mapper
+            )))
+
+        return results
+
     @staticmethod
     def get_parser(collection, node):
         source = collection.source
         target = collection.target
 
-        if (source in COLLECTION_KEYS_IMDB or target in COLLECTION_KEYS_IMDB) and 'imdbid' in node.attrib:
-            return IMDbParser
-
-        if (source in COLLECTION_KEYS_TMDB or target in COLLECTION_KEYS_TMDB) and (
-            'tmdbid' in node.attrib or
-            'tmdbmid' in node.attrib or
-            'tmdbsid' in node.attrib
-        ):
-            return TMDbParser
+        for keys, parser in PARSERS:
+            if source not in keys and target not in keys:
+                continue
 
-        if (source in COLLECTION_KEYS_TVDB or target in COLLECTION_KEYS_TVDB) and 'tvdbid' in node.attrib:
-            return TVDbParser
+            for attribute in parser.__attributes__:
+                if attribute in node.attrib:
+                    return parser
 
         return None
@@ -1,124 +1,67 @@
-from oem_updater.core.constants import TVDB_API_KEY
 from oem_updater.models import Show, Season, SeasonMapping
+from oem_database_updater_anidb.metadata.anidb_ import AniDbMetadata, AniDbSummary
+from oem_database_updater_anidb.metadata.tvdb_ import TVDbMetadata, TVDbSummary
 
-from appdirs import AppDirs
-import anidb
 import logging
-import os
-import tvdb_api
 
 log = logging.getLogger(__name__)
 
+# Version of the absolute mapping output (included in the digest index version)
+VERSION = 1
 
-class AbsoluteMapper(object):
-    constructed = False
-
-    anidb = None
-    anidb_cache = {}
-
-    tvdb = None
-    tvdb_cache = {}
-
-    @classmethod
-    def _construct(cls):
-        if cls.constructed:
-            return
-
-        dirs = AppDirs('oem-updater', 'OpenEntityMap')
-
-        # Ensure directories exist
-        if not os.path.exists(dirs.user_cache_dir):
-            os.makedirs(dirs.user_cache_dir)
 
-        # Construct API clients
-        cls.anidb = anidb.Anidb(cache=dirs.user_cache_dir, rate_limit=5)
-        cls.tvdb = tvdb_api.Tvdb(apikey=TVDB_API_KEY, cache=dirs.user_cache_dir, use_requests=True)
-
-        cls.constructed = True
+class AbsoluteMapper(object):
+    layouts = {}
 
     @classmethod
     def process(cls, collection, item):
         if not isinstance(item, Show):
             return False
 
-        # Ensure clients are constructed
-        cls._construct()
-
         # Retrieve default season
         default_season = item.parameters.get('default_season')
 
         if default_season != "a":
             return True
 
-        # Fetch metadata
+        # Parse episode offset
+        episode_offset = None
+
+        if 'episode_offset' in item.parameters:
+            try:
+                episode_offset = int(item.parameters['episode_offset'])
+            except Exception:
+                pass
+
+        # Retrieve season layout
         try:
-            anidb_metadata, tvdb_metadata = cls.fetch(item.identifiers)
+            layout = cls.get_layout(item.identifiers, episode_offset)
         except Exception as ex:
             log.warn('Unable to fetch metadata for %r - %s', item.identifiers, ex)
             return False
 
-        if not anidb_metadata or not tvdb_metadata:
+        if layout is None:
             log.warn('Unable to fetch metadata for %r', item.identifiers)
             return False
 
         # Map episodes
         if collection.source == 'anidb' and collection.target == 'tvdb':
-            cls.map_episodes_anidb(item, anidb_metadata, tvdb_metadata)
+            cls.map_episodes_anidb(item, layout)
         elif collection.source == 'tvdb' and collection.target == 'anidb':
-            cls.map_episodes_tvdb(item, anidb_metadata, tvdb_metadata)
+            cls.map_episodes_tvdb(item, layout)
         else:
             raise ValueError('Unsupported collection target: %r' % collection.target)
 
         return True
 
     @classmethod
-    def map_episodes_anidb(cls, item, m_anidb, m_tvdb):
-        # Parse episode offset
-        episode_offset = None
-
-        if 'episode_offset' in item.parameters:
-            try:
-                episode_offset = int(item.parameters['episode_offset'])
-            except Exception:
-                pass
-
+    def map_episodes_anidb(cls, item, layout):
         # Ensure season exists
         if '1' not in item.seasons:
             item.seasons['1'] = Season(item.collection, item, '1')
 
         # Construct season mappings
-        for season_num, season in m_tvdb.items():
-            if season_num < 1:
-                continue
-
-            season_num = str(season_num)
-
-            # Retrieve absolute number
-            if 1 not in season:
-                continue
-
-            absolute_num = season[1].get('absolute_number')
-
-            if not absolute_num:
-                continue
-
-            absolute_num = int(absolute_num)
-
-            if episode_offset:
-                absolute_num -= episode_offset
-
-            if absolute_num < 1:
-                continue
-
-            # Ensure episode exists in anidb
-            if absolute_num not in m_anidb.episodes:
-                continue
-
-            # Construct season mapping
-            episode_count = len([
-                e for e in season.itervalues() if e['episodenumber'] != '0'
-            ])
-
+        for season_num, absolute_num, episode_count in layout:
             item.seasons['1'].mappings.append(
                 SeasonMapping(
                     item.collection, season_num,
@@ -138,36 +81,46 @@ class AbsoluteMapper(object):
         item.parameters['default_season'] = '1'
 
     @classmethod
-    def map_episodes_tvdb(cls, item, m_anidb, m_tvdb):
-        # Parse episode offset
-        episode_offset = None
+    def map_episodes_tvdb(cls, item, layout):
+        # Construct seasons
+        for season_num, absolute_num, _ in layout:
+            if season_num not in item.seasons:
+                item.seasons[season_num] = Season(item.collection, item, season_num)
 
+            item.seasons[season_num].parameters['default_season'] = 1
+            item.seasons[season_num].parameters['episode_offset'] = absolute_num - 1
+
+        # Remove episode offset
         if 'episode_offset' in item.parameters:
-            try:
-                episode_offset = int(item.parameters['episode_offset'])
-            except Exception:
-                pass
+            del item.parameters['episode_offset']
 
-        # Construct seasons
-        first_season = None
+        # Update default season (to the first season)
+        item.parameters['default_season'] = layout[0][0] if layout else None
 
-        for season_num, season in m_tvdb.items():
-            if season_num < 1:
-                continue
+    @classmethod
+    def get_layout(cls, identifiers, episode_offset=None):
+        key = (identifiers.get('anidb'), identifiers.get('tvdb'), episode_offset)
 
-            season_num = str(season_num)
+        # Check if the layout has been built (shared by the anidb -> tvdb and tvdb -> anidb collections)
+        layout = cls.layouts.get(key)
 
-            # Retrieve absolute number
-            if 1 not in season:
-                continue
+        if layout is not None:
+            return layout
 
-            absolute_num = season[1].get('absolute_number')
+        m_anidb, m_tvdb = cls.fetch(identifiers)
 
-            if not absolute_num:
-                continue
+        if not m_anidb or not m_tvdb:
+            return None
+
+        # Build layout
+        layout = cls.layouts[key] = cls.build_layout(m_anidb, m_tvdb, episode_offset)
+        return layout
 
-            absolute_num = int(absolute_num)
+    @classmethod
+    def build_layout(cls, m_anidb, m_tvdb, episode_offset=None):
+        layout = []
 
+        for season_num, absolute_num, episode_count in m_tvdb.seasons:
             if episode_offset:
                 absolute_num -= episode_offset
 
@@ -175,26 +128,12 @@ class AbsoluteMapper(object):
                 continue
 
             # Ensure episode exists in anidb
-            if absolute_num not in m_anidb.episodes:
+            if absolute_num not in m_anidb:
                 continue
 
-            # Set default season to first season
-            if first_season is None:
-                first_season = season_num
-
-            # Construct season
-            if season_num not in item.seasons:
-                item.seasons[season_num] = Season(item.collection, item, season_num)
+            layout.append((str(season_num), absolute_num, episode_count))
 
-            item.seasons[season_num].parameters['default_season'] = 1
-            item.seasons[season_num].parameters['episode_offset'] = absolute_num - 1
-
-        # Remove episode offset
-        if 'episode_offset' in item.parameters:
-            del item.parameters['episode_offset']
-
-        # Update default season
-        item.parameters['default_season'] = first_season
+        return tuple(layout)
 
     @classmethod
     def fetch(cls, identifiers):
@@ -202,7 +141,7 @@ class AbsoluteMapper(object):
         tvdb_id = identifiers.get('tvdb')
 
         if not anidb_id or not tvdb_id:
-            return
+            return None, None
 
         # Fetch metadata
         return (
@@ -212,55 +151,10 @@ class AbsoluteMapper(object):
 
     @classmethod
     def fetch_anidb(cls, anidb_id):
-        # Check if metadata has been cached
-        if anidb_id in cls.anidb_cache:
-            return cls.anidb_cache[anidb_id]
-
-        # Fetch anidb metadata
-        try:
-            anidb_metadata = cls.anidb.anime(anidb_id)
-        except Exception as ex:
-            log.warn('Unable to retrieve %r from anidb.net - %s', anidb_id, ex)
-            cls.anidb_cache[anidb_id] = None
-            return None
-
-        if not anidb_metadata:
-            log.warn('Unable to find %r on anidb.net', anidb_id)
-            cls.anidb_cache[anidb_id] = None
-            return None
-
-        if anidb_metadata._xml.tag == "error":
-            log.error('Error returned from anidb.net: %s', anidb_metadata._xml.text)
-            exit(1)
-
-        # Cache anidb metadata
-        cls.anidb_cache[anidb_id] = anidb_metadata
-        return anidb_metadata
+        # Fetch anidb metadata summary (shared with the metadata parsers)
+        return AniDbSummary.build(AniDbMetadata.fetch(anidb_id))
 
     @classmethod
     def fetch_tvdb(cls, tvdb_id):
-        try:
-            tvdb_id = int(tvdb_id)
-        except Exception as ex:
-            raise ValueError('Invalid value provided for "tvdb_id" - %s' % ex)
-
-        # Check if metadata has been cached
-        if tvdb_id in cls.tvdb_cache:
-            return cls.tvdb_cache[tvdb_id]
-
-        # Fetch tvdb metadata
-        try:
-            tvdb_metadata = cls.tvdb[tvdb_id]
-        except Exception as ex:
-            log.warn('Unable to retrieve %r from thetvdb - %s', tvdb_id, ex)
-            cls.tvdb_cache[tvdb_id] = None
-            return None
-
-        if not tvdb_metadata:
-            log.warn('Unable to find %r on thetvdb.com', tvdb_id)
-            cls.tvdb_cache[tvdb_id] = None
-            return None
-
-        # Cache tvdb metadata
-        cls.tvdb_cache[tvdb_id] = tvdb_metadata
-        return tvdb_metadata
+        # Fetch tvdb metadata summary
+        return TVDbSummary.build(TVDbMetadata.fetch(tvdb_id))
@@ -1,24 +1,164 @@
+from oem_framework.core.elapsed import Elapsed
+from oem_framework.models import Item
 from oem_updater.models import Season, SeasonMapping, Episode, EpisodeMapping, Range
 from oem_database_updater_anidb.constants import COLLECTIONS_MOVIES, COLLECTIONS_SHOWS
+from oem_database_updater_anidb.core.memo import BoundedCache
+from oem_database_updater_anidb.core.profiler import Profiler
+from oem_database_updater_anidb.parsers.core.absolute import AbsoluteMapper
+from oem_database_updater_anidb.parsers.core.records import AnimeRecord, ItemRecord
 
+import logging
 import re
 
+log = logging.getLogger(__name__)
+
+RE_EPISODE_SEPARATOR = re.compile(r'[;:]')
+
 
 class BaseParser(object):
+    __attributes__ = []
+
+    episodes_cache = BoundedCache(50000)
+    timeline_cache = BoundedCache(10000)
+
+    ranges_cache = BoundedCache(10000)
+    timelines_cache = BoundedCache(10000)
+
     @classmethod
     def parse(cls, collection, node, use_absolute_mapper=True):
+        for record in cls.parse_records(collection, node, use_absolute_mapper=use_absolute_mapper):
+            item = record.construct()
+
+            if not item:
+                continue
+
+            yield item
+
+    @classmethod
+    def parse_records(cls, collection, node, anime=None, use_absolute_mapper=True):
+        if anime is None:
+            anime = AnimeRecord.from_node(node)
+
+        # Ensure default season is defined
+        if anime.default_season is None:
+            return
+
+        # Ensure AniDB identifier is valid
+        if anime.anidb_id is None:
+            log.warn('Item has an invalid AniDB identifier: %r ', anime.anidb_id)
+            return
+
+        # Retrieve service identifiers
+        media, service_ids = anime.get_identifiers(cls)
+
+        if not service_ids:
+            return
+
+        # Retrieve item media
+        collection_media = cls.get_collection_media(collection)
+
+        if media is None:
+            media = collection_media
+        elif media != collection_media:
+            return
+
+        # Retrieve identifier key
+        identifier_key = cls.get_identifier_key(collection)
+
+        if identifier_key is None:
+            log.warn('Unable to find identifier key')
+            return
+
+        # Parse items
+        for x, service_id in enumerate(service_ids):
+            if service_id == 'unknown':
+                continue
+
+            # Determine item episode offset
+            episode_offset = anime.episode_offset
+
+            if len(service_ids) > 1:
+                episode_offset = (episode_offset or 0) + x
+
+            if episode_offset is not None:
+                if episode_offset != 0:
+                    episode_offset = str(episode_offset)
+                else:
+                    episode_offset = None
+
+            # Construct record
+            yield ItemRecord(
+                cls, collection, anime, media,
+
+                cls.parse_identifiers({
+                    'anidb': anime.anidb_id,
+                    identifier_key: service_id
+                }),
+
+                anime.default_season,
+                episode_offset,
+                use_absolute_mapper=use_absolute_mapper
+            )
+
+    @classmethod
+    def get_identifiers(cls, attrib):
+        raise NotImplementedError
+
+    @classmethod
+    def get_identifier_key(cls, collection):
+        raise NotImplementedError
+
+    @classmethod
+    def validate_identifiers(cls, media, identifiers):
         raise NotImplementedError
 
     @classmethod
-    def get_anidb_id(cls, node):
-        anidb_id = node.attrib.get('anidbid').split(',')
+    @Profiler.stage('parse')
+    @Elapsed.track
+    def parse_one(cls, record):
+        collection = record.collection
 
-        if len(anidb_id) == 1:
-            anidb_id = anidb_id[0]
-        elif len(anidb_id) < 1:
-            anidb_id = None
+        # Construct item
+        item = Item.construct(
+            collection=collection,
+            media=record.media,
 
-        return anidb_id
+            identifiers=dict(record.identifiers),
+            names={},
+
+            default_season=record.default_season,
+            episode_offset=record.episode_offset
+        )
+
+        # Parse names
+        cls.parse_names(item, collection, record.anime)
+
+        # Validate item
+        valid = cls.validate(item, record)
+
+        if not valid:
+            # Retry item on the next run (if validation failed temporarily)
+            if valid is None:
+                record.retry = True
+
+            return None
+
+        # Parse mappings
+        if item.media == 'show' and not cls.parse_mappings(item, collection, record.anime.mappings):
+            return None
+
+        # Parse supplemental
+        cls.parse_supplemental(item, record.anime)
+
+        # Convert absolute mappings (if enabled), unmapped items are retried on the next run
+        if record.use_absolute_mapper and not AbsoluteMapper.process(collection, item) and record.absolute:
+            record.retry = True
+
+        return item
+
+    @classmethod
+    def validate(cls, item, record):
+        return True
 
     @classmethod
     def get_collection_media(cls, collection):
@@ -33,30 +173,21 @@ class BaseParser(object):
         raise Exception('Unknown collection media: %r' % collection)
 
     @classmethod
-    def parse_names(cls, item, collection, node):
+    def parse_names(cls, item, collection, anime):
         target_key = item.identifiers[collection.target]
 
         if type(target_key) is list:
             for key in target_key:
-                item.names[key] = set([node.find('name').text])
+                item.names[key] = set([anime.name])
         else:
-            item.names[target_key] = set([node.find('name').text])
+            item.names[target_key] = set([anime.name])
 
     @classmethod
-    def parse_supplemental(cls, item, node):
-        supplemental = node.find('supplemental-info')
-
-        if supplemental is None:
+    def parse_supplemental(cls, item, anime):
+        if anime.supplemental is None:
             return
 
-        item.supplemental = {}
-
-        # TODO store all supplemental nodes
-        for key in ['studio']:
-            node = supplemental.find(key)
-
-            if node is not None:
-                item.supplemental[key] = node.text
+        item.supplemental = dict(anime.supplemental)
 
     @classmethod
     def parse_identifiers(cls, identifiers):
@@ -109,7 +240,7 @@ class BaseParser(object):
         source_season, target_season = identifier
 
         # Parse episodes
-        episodes = list(cls.parse_episodes(collection, mapping.text))
+        episodes = cls.parse_episodes(collection, mapping.text)
 
         if not episodes:
             return False
@@ -139,15 +270,50 @@ class BaseParser(object):
                     season=target_season,
                     number=t_number,
 
-                    timeline={
-                        'source': Range(collection, t_start, t_end),
-                        'target': Range(collection, s_start, s_end)
-                    }
+                    timeline=cls.get_timeline(collection, (t_start, t_end), (s_start, s_end))
                 )
             )
 
         return True
 
+    @classmethod
+    def clear_caches(cls):
+        # Release cached ranges and timelines (these reference the collections they were parsed for)
+        BaseParser.ranges_cache.clear()
+        BaseParser.timelines_cache.clear()
+
+        # Release absolute layouts (rebuilt from the current metadata on each run)
+        AbsoluteMapper.layouts.clear()
+
+    @classmethod
+    def get_timeline(cls, collection, source, target):
+        key = (id(collection), source, target)
+
+        # Retrieve timeline from cache (timelines are shared between episode mappings, and shouldn't be modified)
+        try:
+            return cls.timelines_cache[key]
+        except KeyError:
+            pass
+
+        # Construct timeline
+        return cls.timelines_cache.set(key, {
+            'source': cls.get_range(collection, source),
+            'target': cls.get_range(collection, target)
+        })
+
+    @classmethod
+    def get_range(cls, collection, value):
+        key = (id(collection), value)
+
+        # Retrieve range from cache
+        try:
+            return cls.ranges_cache[key]
+        except KeyError:
+            pass
+
+        # Construct range
+        return cls.ranges_cache.set(key, Range(collection, value[0], value[1]))
+
     @classmethod
     def parse_mappings_season(cls, collection, item, mapping, identifier):
         source_season, target_season = identifier
@@ -185,20 +351,34 @@ class BaseParser(object):
 
     @classmethod
     def parse_episodes(cls, collection, value):
-        episodes = [
-            tuple(episode.split('-'))
-            for episode in re.split(r"[;:]", value)
-            if episode
-        ]
+        key = (collection.source == 'anidb', value)
+
+        # Retrieve parsed episodes from cache (mapping strings are repeated often)
+        try:
+            return cls.episodes_cache[key]
+        except KeyError:
+            pass
+
+        # Parse episodes
+        return cls.episodes_cache.set(key, tuple(cls._parse_episodes(
+            key[0], value
+        )))
+
+    @classmethod
+    def _parse_episodes(cls, anidb_source, value):
+        for episode in RE_EPISODE_SEPARATOR.split(value):
+            if not episode:
+                continue
+
+            item = episode.split('-')
 
-        for item in episodes:
             if len(item) != 2:
                 continue
 
             anidb_numbers, other_numbers = item
 
             # Select source + target numbers
-            if collection.source == 'anidb':
+            if anidb_source:
                 source_numbers, target_numbers = anidb_numbers, other_numbers
             else:
                 source_numbers, target_numbers = other_numbers, anidb_numbers
@@ -210,6 +390,12 @@ class BaseParser(object):
             target_numbers = target_numbers.split('+')
             target_count = len(target_numbers)
 
+            # Calculate target timeline ranges
+            targets = [
+                (target_number,) + cls.get_timeline_range(target_index, target_count)
+                for target_index, target_number in enumerate(target_numbers)
+            ]
+
             # Iterate over source episodes
             for source_index, source_number in enumerate(source_numbers):
                 # Ensure source number is defined
@@ -217,22 +403,24 @@ class BaseParser(object):
                     continue
 
                 # Calculate source timeline range
-                source_start = int(round((float(source_index) / source_count) * 100, 0))
-                source_end = int(round((float(source_index + 1) / source_count) * 100, 0))
-
-                # Iterate over target episodes
-                for target_index, target_number in enumerate(target_numbers):
-                    # Calculate target timeline range
-                    target_start = int(round((float(target_index) / target_count) * 100, 0))
-                    target_end = int(round((float(target_index + 1) / target_count) * 100, 0))
-
-                    # Yield episode
-                    yield (
-                        source_number,
-                        source_start,
-                        source_end
-                    ), (
-                        target_number,
-                        target_start,
-                        target_end
-                    )
+                source = (source_number,) + cls.get_timeline_range(source_index, source_count)
+
+                # Yield episodes
+                for target in targets:
+                    yield source, target
+
+    @classmethod
+    def get_timeline_range(cls, index, count):
+        key = (index, count)
+
+        # Retrieve timeline range from cache
+        try:
+            return cls.timeline_cache[key]
+        except KeyError:
+            pass
+
+        # Calculate timeline range
+        return cls.timeline_cache.set(key, (
+            int(round((float(index) / count) * 100, 0)),
+            int(round((float(index + 1) / count) * 100, 0))
+        ))
@@ -0,0 +1,292 @@
+from oem_framework.core.helpers import try_convert
+
+import hashlib
+import json
+
+VERSION = 2
+
+
+def supports_binary(collection):
+    # Collection references (in worker processes) provide the storage format flag directly
+    binary = getattr(collection, 'binary', None)
+
+    if binary is not None:
+        return binary
+
+    return collection.storage.format.__supports_binary__
+
+
+class MappingRecord(object):
+    __slots__ = ['attrib', 'text']
+
+    def __init__(self, attrib, text):
+        self.attrib = attrib
+        self.text = text
+
+    @classmethod
+    def from_node(cls, node):
+        return cls(dict(node.attrib), node.text)
+
+    def __getstate__(self):
+        return self.attrib, self.text
+
+    def __setstate__(self, state):
+        self.attrib, self.text = state
+
+
+class AnimeRecord(object):
+    __slots__ = [
+        'attrib', 'name', 'mappings', 'supplemental',
+        'anidb_id', 'default_season', 'episode_offset',
+        '_digest', '_identifiers'
+    ]
+
+    def __init__(self, attrib, name, mappings, supplemental=None):
+        self.attrib = attrib
+        self.name = name
+
+        self.mappings = mappings
+        self.supplemental = supplemental
+
+        self.anidb_id = None
+        self.default_season = None
+        self.episode_offset = None
+
+        self._digest = None
+        self._identifiers = {}
+
+        self.parse_attributes()
+
+    def parse_attributes(self):
+        # Retrieve AniDB identifier
+        anidb_id = (self.attrib.get('anidbid') or '').split(',')
+
+        if len(anidb_id) == 1:
+            anidb_id = anidb_id[0]
+
+        self.anidb_id = anidb_id or None
+
+        # Retrieve default season
+        self.default_season = self.attrib.get('defaulttvdbseason')
+
+        # Retrieve episode offset (and cast to integer)
+        self.episode_offset = try_convert(self.attrib.get('episodeoffset'), int)
+
+    def get_identifiers(self, parser):
+        try:
+            return self._identifiers[parser]
+        except KeyError:
+            pass
+
+        # Retrieve identifiers for service (validated once per node)
+        media, identifiers = parser.get_identifiers(self.attrib)
+
+        if not parser.validate_identifiers(media, identifiers):
+            media, identifiers = None, None
+
+        self._identifiers[parser] = (media, identifiers)
+        return media, identifiers
+
+    @classmethod
+    def from_node(cls, node):
+        # Parse supplemental
+        supplemental = None
+        supplemental_node = node.find('supplemental-info')
+
+        if supplemental_node is not None:
+            supplemental = {}
+
+            # TODO store all supplemental nodes
+            for key in ['studio']:
+                child = supplemental_node.find(key)
+
+                if child is not None:
+                    supplemental[key] = child.text
+
+        # Construct record
+        return cls(
+            dict(node.attrib),
+            node.find('name').text,
+
+            tuple([
+                MappingRecord.from_node(mapping)
+                for mapping in node.findall('mapping-list//mapping')
+            ]),
+            supplemental
+        )
+
+    def digest(self):
+        if self._digest is not None:
+            return self._digest
+
+        data = json.dumps([
+            self.attrib,
+            self.name,
+            [[mapping.attrib, mapping.text] for mapping in self.mappings],
+            self.supplemental
+        ], sort_keys=True)
+
+        self._digest = hashlib.sha1(data.encode('utf-8')).hexdigest()
+        return self._digest
+
+    def __getstate__(self):
+        return self.attrib, self.name, self.mappings, self.supplemental
+
+    def __setstate__(self, state):
+        self.attrib, self.name, self.mappings, self.supplemental = state
+
+        self._digest = None
+        self._identifiers = {}
+
+        self.parse_attributes()
+
+
+class ItemRecord(object):
+    __slots__ = [
+        'parser', 'collection', 'anime', 'media', 'identifiers',
+        'default_season', 'episode_offset', 'use_absolute_mapper', 'retry',
+        '_hash', '_item', '_base'
+    ]
+
+    def __init__(self, parser, collection, anime, media, identifiers, default_season, episode_offset,
+                 use_absolute_mapper=True):
+        self.parser = parser
+        self.collection = collection
+        self.anime = anime
+
+        self.media = media
+        self.identifiers = identifiers
+
+        self.default_season = default_season
+        self.episode_offset = episode_offset
+
+        self.use_absolute_mapper = use_absolute_mapper
+        self.retry = False
+
+        self._base = None
+        self._hash = None
+        self._item = None
+
+    @property
+    def absolute(self):
+        return self.use_absolute_mapper and self.media == 'show' and self.default_season == 'a'
+
+    def prepare(self):
+        # Absolute mappings depend on remote metadata (hashed by the main process)
+        if not self.absolute:
+            self.hash()
+
+        return self
+
+    def construct(self):
+        # Return item constructed during hashing (if available)
+        if self._item is not None:
+            item, self._item = self._item, None
+            return item
+
+        return self.parser.parse_one(self)
+
+    def copy(self, identifiers=None):
+        record = ItemRecord(
+            self.parser, self.collection, self.anime,
+            self.media, dict(self.identifiers),
+            self.default_season, self.episode_offset,
+            use_absolute_mapper=self.use_absolute_mapper
+        )
+
+        if identifiers:
+            record.identifiers.update(identifiers)
+
+        # Share base hash with copy (only identifiers differ)
+        if not self.absolute:
+            record._base = self.hash_base()
+
+        return record
+
+    def hash(self):
+        if self._hash is not None:
+            return self._hash
+
+        # Absolute mappings depend on remote metadata, use the hash of the constructed item
+        if self.absolute:
+            self._item = self.parser.parse_one(self)
+
+            if self._item is not None:
+                self._hash = self._item.hash()
+
+            return self._hash
+
+        # Calculate hash of the record (extends the base hash with the item identifiers)
+        m = self.hash_base().copy()
+        m.update(json.dumps(self.identifiers, sort_keys=True).encode('utf-8'))
+
+        if supports_binary(self.collection):
+            self._hash = m.digest()
+        else:
+            self._hash = m.hexdigest()
+
+        return self._hash
+
+    def hash_base(self):
+        if self._base is not None:
+            return self._base
+
+        data = json.dumps([
+            VERSION,
+            self.collection.source,
+            self.collection.target,
+            self.media,
+            self.default_season,
+            self.episode_offset,
+            self.anime.digest()
+        ], sort_keys=True)
+
+        self._base = hashlib.md5(data.encode('utf-8'))
+        return self._base
+
+    def __getstate__(self):
+        # Hashes are returned from worker processes (the base hash can't be pickled)
+        return tuple([getattr(self, key) for key in self.__slots__[:-1]])
+
+    def __setstate__(self, state):
+        for key, value in zip(self.__slots__[:-1], state):
+            setattr(self, key, value)
+
+        self._base = None
+
+
+class ItemGroup(object):
+    __slots__ = ['service', 'current', 'pending']
+
+    def __init__(self, service):
+        self.service = service
+
+        self.current = None
+        self.pending = []
+
+    def add(self, record):
+        self.pending.append(record)
+
+    def construct(self):
+        pending, self.pending = self.pending, []
+
+        # Retry group on the next run (if any records failed temporarily)
+        retry = False
+
+        for record in pending:
+            item = record.construct()
+
+            retry |= record.retry
+
+            if item is None:
+                continue
+
+            if self.current is None:
+                self.current = item
+                continue
+
+            # Add item to `current` object (and convert to "multiple" structure if needed)
+            if not self.current.add(item, self.service):
+                return False, self.current, retry
+
+        return True, self.current, retry
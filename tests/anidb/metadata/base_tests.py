@@ -0,0 +1,48 @@
+from oem_database_updater_anidb.metadata.core.base import Metadata
+from oem_database_updater_anidb.metadata.core.cache import MetadataCache
+
+import threading
+import time
+
+
+class MockMetadata(Metadata):
+    __key__ = 'mock'
+
+    cache = {}
+    calls = []
+
+    @classmethod
+    def fetch(cls, key):
+        return cls.request(key, cls._fetch, key)
+
+    @classmethod
+    def _fetch(cls, key):
+        cls.calls.append(key)
+        time.sleep(0.1)
+
+        return cls.set_cached(key, 'value:%s' % key)
+
+
+def test_request_deduplicated():
+    MetadataCache.configure(enabled=False)
+
+    results = []
+
+    def run():
+        results.append(MockMetadata.fetch('1530'))
+
+    threads = [threading.Thread(target=run) for _ in range(5)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    # Ensure metadata was only fetched once
+    assert MockMetadata.calls == ['1530']
+    assert results == ['value:1530'] * 5
+
+    # Ensure cached metadata is returned
+    assert MockMetadata.fetch('1530') == 'value:1530'
+    assert MockMetadata.calls == ['1530']
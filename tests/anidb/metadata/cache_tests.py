@@ -0,0 +1,60 @@
+from oem_database_updater_anidb.metadata.core.cache import MetadataCache
+
+import time
+
+
+def test_persisted(tmpdir):
+    path = str(tmpdir.join('metadata.db'))
+
+    cache = MetadataCache(path)
+    assert cache.set('anidb', '1530', {'episodes': [1, 2, 3]}) is True
+    assert cache.set('tmdb', ('movie', '123'), None) is True
+    cache.close()
+
+    # Ensure entries are available in a new cache instance
+    cache = MetadataCache(path)
+
+    assert cache.get('anidb', '1530') == (True, {'episodes': [1, 2, 3]})
+    assert cache.get('tmdb', ('movie', '123')) == (True, None)
+    assert cache.get('tmdb', ('show', '123')) == (False, None)
+
+
+def test_expired(tmpdir, monkeypatch):
+    cache = MetadataCache(str(tmpdir.join('metadata.db')), ttl=60, negative_ttl=10)
+
+    cache.set('anidb', '1', 'value')
+    cache.set('anidb', '2', None)
+
+    # Ensure negative results expire first
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 30)
+
+    assert cache.get('anidb', '1') == (True, 'value')
+    assert cache.get('anidb', '2') == (False, None)
+
+    # Ensure results expire
+    monkeypatch.setattr(time, 'time', lambda: now + 90)
+
+    assert cache.get('anidb', '1') == (False, None)
+
+
+def test_disabled_ttl(tmpdir):
+    cache = MetadataCache(str(tmpdir.join('metadata.db')), negative_ttl=0)
+
+    assert cache.set('anidb', '1', None) is False
+    assert cache.get('anidb', '1') == (False, None)
+
+
+def test_eviction(tmpdir):
+    cache = MetadataCache(str(tmpdir.join('metadata.db')), max_entries=10)
+
+    for x in range(25):
+        cache.set('anidb', str(x), x)
+
+    count, = cache.connection.execute('SELECT COUNT(*) FROM entries').fetchone()
+
+    assert count == 10
+
+    # Ensure the most recent entries were kept
+    assert cache.get('anidb', '24') == (True, 24)
+    assert cache.get('anidb', '0') == (False, None)
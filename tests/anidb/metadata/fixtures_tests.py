@@ -0,0 +1,138 @@
+from oem_database_updater_anidb.metadata.anidb_ import AniDbMetadata, AniDbSummary
+from oem_database_updater_anidb.metadata.core.base import Metadata
+from oem_database_updater_anidb.metadata.core.cache import MetadataCache
+from oem_database_updater_anidb.metadata.core.fixtures import FixtureStore
+from oem_database_updater_anidb.metadata.tvdb_ import TVDbMetadata, TVDbSummary
+
+from six.moves import cPickle as pickle
+import io
+import json
+import os
+import pytest
+import zipfile
+
+
+class MockMetadata(Metadata):
+    __key__ = 'tmdb'
+
+    cache = {}
+    calls = []
+
+    @classmethod
+    def fetch(cls, tmdb_id, media):
+        return cls.request((media, tmdb_id), cls._fetch, tmdb_id, media)
+
+    @classmethod
+    def _fetch(cls, tmdb_id, media):
+        cls.calls.append((media, tmdb_id))
+
+        if tmdb_id == '404':
+            return cls.set_cached((media, tmdb_id), None)
+
+        return cls.set_cached((media, tmdb_id), {'id': tmdb_id, 'media': media})
+
+
+@pytest.fixture(autouse=True)
+def reset(request, monkeypatch):
+    MetadataCache.configure(enabled=False)
+
+    monkeypatch.setattr(MockMetadata, 'cache', {})
+    monkeypatch.setattr(MockMetadata, 'calls', [])
+
+    monkeypatch.setattr(AniDbMetadata, 'cache', {})
+    monkeypatch.setattr(TVDbMetadata, 'cache', {})
+
+    request.addfinalizer(lambda: FixtureStore.configure(None))
+
+
+def test_record_replay(tmpdir, monkeypatch):
+    path = str(tmpdir.join('fixtures'))
+
+    # Record fixtures
+    FixtureStore.configure(path, 'record')
+
+    assert MockMetadata.fetch('123', 'movie') == {'id': '123', 'media': 'movie'}
+    assert MockMetadata.fetch('404', 'show') is None
+    assert len(MockMetadata.calls) == 2
+
+    assert os.path.exists(os.path.join(path, 'tmdb', 'movie-123.json'))
+
+    # Replay fixtures
+    monkeypatch.setattr(MockMetadata, 'cache', {})
+    monkeypatch.setattr(MockMetadata, 'calls', [])
+
+    FixtureStore.configure(path, 'replay')
+
+    assert MockMetadata.fetch('123', 'movie') == {'id': '123', 'media': 'movie'}
+    assert MockMetadata.fetch('404', 'show') is None
+    assert MockMetadata.fetch('456', 'movie') is None
+
+    # Ensure no requests were made
+    assert MockMetadata.calls == []
+
+
+def test_replay_archive(tmpdir):
+    path = str(tmpdir.join('fixtures'))
+
+    # Record fixtures
+    FixtureStore.configure(path, 'record')
+    MockMetadata.fetch('123', 'movie')
+
+    # Build archive
+    archive_path = str(tmpdir.join('fixtures.zip'))
+
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        archive.write(os.path.join(path, 'tmdb', 'movie-123.json'), 'tmdb/movie-123.json')
+
+    # Replay fixtures from archive
+    MockMetadata.cache.clear()
+    FixtureStore.configure(archive_path, 'replay')
+
+    assert MockMetadata.fetch('123', 'movie') == {'id': '123', 'media': 'movie'}
+    assert MockMetadata.calls == [('movie', '123')]
+
+
+def test_replay_summaries(tmpdir, monkeypatch):
+    path = str(tmpdir.join('fixtures'))
+
+    # Record fixtures
+    FixtureStore.configure(path, 'record')
+
+    AniDbMetadata.set_cached(1, AniDbSummary(0b1110))
+    TVDbMetadata.set_cached(2, TVDbSummary([(1, 1, 13), (2, 14, 12)]))
+
+    # Ensure fixtures only contain data
+    with io.open(os.path.join(path, 'anidb', '1.json'), 'rb') as fp:
+        assert json.loads(fp.read().decode('utf-8')) == {'version': 1, 'value': 14}
+
+    with io.open(os.path.join(path, 'tvdb', '2.json'), 'rb') as fp:
+        assert json.loads(fp.read().decode('utf-8')) == {'version': 1, 'value': [[1, 1, 13], [2, 14, 12]]}
+
+    # Replay fixtures
+    monkeypatch.setattr(AniDbMetadata, 'cache', {})
+    monkeypatch.setattr(TVDbMetadata, 'cache', {})
+
+    FixtureStore.configure(path, 'replay')
+
+    assert AniDbMetadata.fetch(1).episodes == 0b1110
+    assert TVDbMetadata.fetch(2).seasons == ((1, 1, 13), (2, 14, 12))
+
+
+@pytest.mark.parametrize('data', [
+    json.dumps({'version': 2, 'value': 14}).encode('utf-8'),
+    json.dumps(14).encode('utf-8'),
+    pickle.dumps({'id': '123', 'media': 'movie'}, 2)
+])
+def test_replay_rejects_unknown_format(tmpdir, data):
+    path = str(tmpdir.join('fixtures'))
+
+    os.makedirs(os.path.join(path, 'tmdb'))
+
+    with io.open(os.path.join(path, 'tmdb', 'movie-123.json'), 'wb') as fp:
+        fp.write(data)
+
+    # Ensure fixtures recorded in an unknown format are rejected
+    FixtureStore.configure(path, 'replay')
+
+    with pytest.raises(ValueError):
+        MockMetadata.fetch('123', 'movie')
@@ -0,0 +1,87 @@
+from oem_database_updater_anidb.metadata.anidb_ import AniDbMetadata
+from oem_database_updater_anidb.metadata.core.identifiers import IdentifierSet, TMDbIdentifiers
+from oem_database_updater_anidb.metadata.tmdb_ import TMDbMetadata
+from oem_database_updater_anidb.parsers.tmdb_ import TMDbParser
+
+import gzip
+import pytest
+
+
+class Collection(object):
+    source = 'anidb'
+    target = 'tmdb:movie'
+
+
+class Item(object):
+    media = 'movie'
+
+    def __init__(self, tmdb_id):
+        self.identifiers = {'anidb': '1530', 'tmdb:movie': tmdb_id}
+
+
+class Record(object):
+    collection = Collection()
+
+
+def write_export(path, ids):
+    with gzip.open(path, 'wb') as fp:
+        for tmdb_id in ids:
+            fp.write(('{"adult":false,"id":%d,"original_title":"Title %d","popularity":0.6,"video":false}\n' % (
+                tmdb_id, tmdb_id
+            )).encode('utf-8'))
+
+    return path
+
+
+@pytest.fixture
+def exports(tmpdir, request):
+    TMDbIdentifiers.configure(
+        movies=write_export(str(tmpdir.join('movie_ids.json.gz')), [603, 11, 1891, 11]),
+        shows=write_export(str(tmpdir.join('tv_series_ids.json.gz')), [1399, 30983])
+    )
+
+    request.addfinalizer(TMDbIdentifiers.configure)
+
+
+def test_load(tmpdir):
+    index = IdentifierSet.load(write_export(str(tmpdir.join('movie_ids.json.gz')), [603, 11, 1891, 11]))
+
+    assert list(index.ids) == [11, 603, 1891]
+    assert index.maximum == 1891
+
+    assert 603 in index
+    assert 604 not in index
+    assert 1 not in index
+
+
+def test_contains(exports):
+    assert TMDbIdentifiers.contains('movie', '603') is True
+    assert TMDbIdentifiers.contains('movie', '604') is False
+    assert TMDbIdentifiers.contains('show', '30983') is True
+    assert TMDbIdentifiers.contains('show', '603') is False
+
+    # Ensure identifiers that can't be validated are reported as unknown
+    assert TMDbIdentifiers.contains('movie', '5000') is None
+    assert TMDbIdentifiers.contains('movie', 'unknown') is None
+
+
+def test_disabled():
+    TMDbIdentifiers.configure()
+
+    assert TMDbIdentifiers.contains('movie', '603') is None
+
+
+def test_validate(exports, monkeypatch):
+    fetched = []
+
+    monkeypatch.setattr(AniDbMetadata, 'fetch', classmethod(lambda cls, anidb_id: True))
+    monkeypatch.setattr(TMDbMetadata, 'fetch', classmethod(lambda cls, tmdb_id, media: fetched.append(tmdb_id) or True))
+
+    # Ensure exported identifiers are validated without requests
+    assert TMDbParser.validate(Item('603'), Record()) is True
+    assert TMDbParser.validate(Item('604'), Record()) is False
+    assert fetched == []
+
+    # Ensure identifiers newer than the export are fetched
+    assert TMDbParser.validate(Item('5000'), Record()) is True
+    assert fetched == ['5000']
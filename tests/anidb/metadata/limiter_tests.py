@@ -0,0 +1,25 @@
+from oem_database_updater_anidb.metadata.core.limiter import TokenBucket
+
+import time
+
+
+def test_burst():
+    bucket = TokenBucket(1, 5)
+
+    started_at = time.time()
+
+    for _ in range(5):
+        bucket.acquire()
+
+    assert time.time() - started_at < 0.1
+
+
+def test_rate():
+    bucket = TokenBucket(20, 1)
+
+    started_at = time.time()
+
+    for _ in range(5):
+        bucket.acquire()
+
+    assert 0.15 < time.time() - started_at < 1.0
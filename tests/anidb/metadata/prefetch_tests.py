@@ -0,0 +1,153 @@
+from oem_database_updater_anidb.metadata.anidb_ import AniDbMetadata
+from oem_database_updater_anidb.metadata.core.cache import MetadataCache
+from oem_database_updater_anidb.metadata.core.identifiers import TMDbIdentifiers
+from oem_database_updater_anidb.metadata.prefetch import Prefetcher
+from oem_database_updater_anidb.metadata.tmdb_ import TMDbMetadata
+from oem_database_updater_anidb.metadata.tvdb_ import TVDbMetadata
+from tests.anidb.metadata.identifiers_tests import write_export
+from tests.core.generator import generate_anime_list
+from tests.core.mock import MockCollection
+
+import pytest
+import threading
+import time
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    MetadataCache.configure(enabled=False)
+
+    lock = threading.Lock()
+    result = []
+
+    def recorder(metadata):
+        def fetch(cls, *args):
+            with lock:
+                result.append((metadata.__key__,) + args)
+
+            return cls.set_cached(args[0] if len(args) == 1 else (args[1], args[0]), args)
+
+        return classmethod(fetch)
+
+    for metadata in [AniDbMetadata, TMDbMetadata, TVDbMetadata]:
+        monkeypatch.setattr(metadata, 'cache', {})
+        monkeypatch.setattr(metadata, 'limiter', None)
+        monkeypatch.setattr(metadata, '_fetch', recorder(metadata))
+
+    return result
+
+
+def test_prefetch_window(tmpdir, requests):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    prefetcher = Prefetcher([MockCollection('anidb', 'tmdb:movie')], path, lookahead=6).start()
+
+    try:
+        time.sleep(0.2)
+
+        # Ensure only nodes within the read-ahead window were requested
+        assert sorted(requests) == sorted([
+            ('anidb', '3'), ('tmdb', '1002', 'movie'),
+            ('anidb', '6'), ('tmdb', '1005', 'movie')
+        ])
+
+        # Advance through the remaining nodes
+        for _ in range(30):
+            prefetcher.advance()
+
+        time.sleep(0.2)
+    finally:
+        prefetcher.stop()
+
+    assert len(requests) == 20
+
+
+def test_prefetch_exports(tmpdir, requests, request):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    TMDbIdentifiers.configure(movies=write_export(str(tmpdir.join('movie_ids.json.gz')), [1002, 1003]))
+    request.addfinalizer(TMDbIdentifiers.configure)
+
+    prefetcher = Prefetcher([MockCollection('anidb', 'tmdb:movie')], path, lookahead=6).start()
+
+    try:
+        time.sleep(0.2)
+    finally:
+        prefetcher.stop()
+
+    # Ensure identifiers validated by the export aren't requested
+    assert sorted(requests) == sorted([
+        ('anidb', '3'),
+        ('anidb', '6'), ('tmdb', '1005', 'movie')
+    ])
+
+
+def test_prefetch_cached(tmpdir, requests):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    prefetcher = Prefetcher([MockCollection('anidb', 'tmdb:movie')], path, lookahead=30).start()
+
+    try:
+        time.sleep(0.2)
+    finally:
+        prefetcher.stop()
+
+    del requests[:]
+
+    # Ensure cached metadata is returned without further requests
+    assert AniDbMetadata.fetch('3') == ('3',)
+    assert TMDbMetadata.fetch('1002', 'movie') == ('1002', 'movie')
+
+    assert requests == []
+
+
+def test_prefetch_accepted_window(tmpdir, requests):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    prefetcher = Prefetcher(
+        [MockCollection('anidb', 'tmdb:movie')], path,
+        lookahead=2,
+        accepts=lambda attrib: attrib['anidbid'] in ['27', '30']
+    ).start()
+
+    try:
+        time.sleep(0.2)
+    finally:
+        prefetcher.stop()
+
+    # Ensure only accepted nodes are counted in the read-ahead window
+    assert sorted(requests) == sorted([
+        ('anidb', '27'), ('tmdb', '1026', 'movie'),
+        ('anidb', '30'), ('tmdb', '1029', 'movie')
+    ])
+
+
+def test_prefetch_exit(tmpdir, requests, monkeypatch):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    monkeypatch.setattr(AniDbMetadata, '_fetch', classmethod(lambda cls, anidb_id: exit(1)))
+
+    prefetcher = Prefetcher([MockCollection('anidb', 'tmdb:movie')], path, lookahead=6).start()
+
+    try:
+        time.sleep(0.2)
+
+        # Ensure exits requested by service workers are raised on the main thread
+        with pytest.raises(SystemExit):
+            prefetcher.advance()
+    finally:
+        prefetcher.stop()
+
+
+def test_prefetch_exit_stop(tmpdir, requests, monkeypatch):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    monkeypatch.setattr(AniDbMetadata, '_fetch', classmethod(lambda cls, anidb_id: exit(1)))
+
+    prefetcher = Prefetcher([MockCollection('anidb', 'tmdb:movie')], path, lookahead=6).start()
+
+    time.sleep(0.2)
+
+    # Ensure exits requested after the last node was advanced are raised by `stop()`
+    with pytest.raises(SystemExit):
+        prefetcher.stop()
@@ -0,0 +1,180 @@
+from oem_database_updater_anidb.metadata.core.cache import MetadataCache
+from oem_database_updater_anidb.metadata.core.transport import HttpTransport
+from oem_database_updater_anidb.metadata.tmdb_ import TMDbMetadata
+
+from six.moves import BaseHTTPServer, socketserver
+import gzip
+import io
+import pytest
+import requests
+import threading
+import time
+import tmdbsimple as tmdb
+
+BODY = b'{"id": 1530}' * 64
+TMDB_BODY = b'{"id": 1530, "title": "Cowboy Bebop"}'
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append((self.client_address, self.headers.get('Accept-Encoding')))
+
+        if self.path == '/slow':
+            time.sleep(0.5)
+
+        body = BODY
+
+        if self.path.startswith('/3/'):
+            body = TMDB_BODY
+
+        # Compress response (if supported by the client)
+        if 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            buf = io.BytesIO()
+
+            with gzip.GzipFile(fileobj=buf, mode='wb') as fp:
+                fp.write(body)
+
+            body = buf.getvalue()
+
+            self.send_response(200)
+            self.send_header('Content-Encoding', 'gzip')
+        else:
+            self.send_response(200)
+
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), Handler)
+
+        self.requests = []
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self.server_address[1]
+
+
+@pytest.fixture
+def server(request):
+    server = Server()
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    def cleanup():
+        server.shutdown()
+        server.server_close()
+
+    request.addfinalizer(cleanup)
+    return server
+
+
+@pytest.fixture(autouse=True)
+def transport(request):
+    HttpTransport.configure()
+
+    request.addfinalizer(HttpTransport.configure)
+
+
+def test_keep_alive(server):
+    session = HttpTransport.current()
+
+    for _ in range(10):
+        assert session.get(server.url + '/').content == BODY
+
+    # Ensure a single connection was used for all requests
+    assert len(server.requests) == 10
+    assert len(set([address for address, _ in server.requests])) == 1
+
+
+def test_gzip(server):
+    response = HttpTransport.current().get(server.url + '/')
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.content == BODY
+
+    assert 'gzip' in server.requests[0][1]
+
+
+def test_timeout(server):
+    HttpTransport.configure(retries=0, timeout=0.1)
+
+    with pytest.raises(requests.Timeout):
+        HttpTransport.current().get(server.url + '/slow')
+
+    # Ensure request timeouts override the default
+    assert HttpTransport.current().get(server.url + '/slow', timeout=5).content == BODY
+
+
+def test_pool_size():
+    HttpTransport.configure(pool_size=2)
+
+    adapter = HttpTransport.current().get_adapter('https://api.themoviedb.org/3/movie/1')
+
+    assert adapter._pool_maxsize == 2
+    assert adapter.timeout == 30
+
+
+def test_configure():
+    session = HttpTransport.current()
+    attached = HttpTransport.attach(requests.Session())
+
+    HttpTransport.configure(pool_size=8, timeout=5)
+
+    # Ensure existing sessions are reconfigured in place (clients keep references to them)
+    assert HttpTransport.current() is session
+
+    for value in [session, attached]:
+        adapter = value.get_adapter('https://api.themoviedb.org/3/movie/1')
+
+        assert adapter._pool_maxsize == 8
+        assert adapter.timeout == 5
+
+
+def test_attach(server):
+    session = HttpTransport.attach(requests.Session())
+
+    # Ensure existing sessions use the pooled adapter
+    assert session.get_adapter(server.url).timeout == 30
+    assert session.get(server.url + '/').content == BODY
+
+
+def test_shared(monkeypatch):
+    monkeypatch.setattr(TMDbMetadata, 'constructed', False)
+    monkeypatch.setattr(tmdb, 'REQUESTS_SESSION', None)
+
+    TMDbMetadata._construct()
+
+    # Ensure TMDb requests use the shared session
+    assert tmdb.REQUESTS_SESSION is HttpTransport.current()
+
+
+def test_tmdb_keep_alive(server, monkeypatch):
+    MetadataCache.configure(enabled=False)
+
+    monkeypatch.setattr(TMDbMetadata, 'constructed', False)
+    monkeypatch.setattr(TMDbMetadata, 'cache', {})
+    monkeypatch.setattr(tmdb.base.TMDB, '_get_complete_url', lambda self, path: server.url + '/3/' + path)
+
+    for tmdb_id in range(5):
+        assert TMDbMetadata._fetch(tmdb_id, 'movie') is True
+
+    # Ensure TMDb requests reuse a single connection (tmdbsimple requests "Connection: close")
+    assert len(server.requests) == 5
+    assert len(set([address for address, _ in server.requests])) == 1
+
+    # Ensure only compact values are cached (not client objects)
+    assert TMDbMetadata.cache[('movie', 0)] is True
@@ -0,0 +1,178 @@
+from tests.core.mock import MockCollection
+
+from oem_database_updater_anidb.metadata.anidb_ import AniDbSummary
+from oem_database_updater_anidb.metadata.tvdb_ import TVDbSummary
+from oem_database_updater_anidb.parsers import Parser
+from oem_database_updater_anidb.parsers.core.absolute import AbsoluteMapper
+from oem_updater.models import Show
+
+from six.moves import cPickle as pickle
+import pytest
+
+
+class AniDbItem(object):
+    def __init__(self, episodes):
+        self.episodes = dict([(number, None) for number in episodes])
+
+
+def build_show(seasons):
+    show = {}
+
+    for season_num, (absolute_num, count, specials) in seasons.items():
+        season = show[season_num] = {}
+
+        for number in range(1, count + 1):
+            season[number] = {
+                'absolute_number': str(absolute_num + number - 1) if absolute_num else None,
+                'episodenumber': str(number)
+            }
+
+        for number in range(count + 1, count + specials + 1):
+            season[number] = {'absolute_number': None, 'episodenumber': '0'}
+
+    return show
+
+
+def build_metadata():
+    return (
+        AniDbSummary.build(AniDbItem(list(range(1, 40)) + ['S1', 'C1'])),
+        TVDbSummary.build(build_show({
+            0: (None, 2, 0),
+            1: (1, 13, 0),
+            2: (14, 13, 1),
+            3: (27, 13, 0),
+            4: (None, 5, 0)
+        }))
+    )
+
+
+@pytest.fixture
+def mapper(monkeypatch):
+    metadata = list(build_metadata())
+
+    def fetch(cls, identifiers):
+        return metadata
+
+    monkeypatch.setattr(AbsoluteMapper, 'layouts', {})
+    monkeypatch.setattr(AbsoluteMapper, 'fetch', classmethod(fetch))
+    monkeypatch.setattr(AbsoluteMapper, 'build_layout', classmethod(counted(AbsoluteMapper.build_layout)))
+
+    return metadata
+
+
+def counted(func):
+    def wrapper(cls, *args, **kwargs):
+        wrapper.calls += 1
+        return func(*args, **kwargs)
+
+    wrapper.calls = 0
+    return wrapper
+
+
+def build_item(collection, **parameters):
+    return Show(
+        collection,
+        identifiers={'anidb': '1530', 'tvdb': '81472'},
+        names=set(['Dragon Ball Z']),
+        default_season='a',
+        **parameters
+    )
+
+
+def test_summary():
+    m_anidb, m_tvdb = build_metadata()
+
+    assert 1 in m_anidb
+    assert 39 in m_anidb
+    assert 0 not in m_anidb
+    assert 40 not in m_anidb
+
+    # Ensure only seasons with absolute numbers are summarized (excluding specials from episode counts)
+    assert m_tvdb.seasons == ((1, 1, 13), (2, 14, 13), (3, 27, 13))
+
+    # Ensure summaries are returned as-is
+    assert AniDbSummary.build(m_anidb) is m_anidb
+    assert TVDbSummary.build(None) is None
+
+
+def test_summary_pickle():
+    m_anidb, m_tvdb = build_metadata()
+
+    m_anidb = pickle.loads(pickle.dumps(m_anidb, 2))
+    m_tvdb = pickle.loads(pickle.dumps(m_tvdb, 2))
+
+    assert 39 in m_anidb
+    assert m_tvdb.seasons == ((1, 1, 13), (2, 14, 13), (3, 27, 13))
+
+
+def test_map_anidb():
+    collection = MockCollection('anidb', 'tvdb')
+    item = build_item(collection, episode_offset='13')
+
+    AbsoluteMapper.map_episodes_anidb(item, AbsoluteMapper.build_layout(*build_metadata(), episode_offset=13))
+
+    assert item.parameters == {'default_season': '1'}
+    assert [
+        (m.season, m.start, m.end, m.offset)
+        for m in item.seasons['1'].mappings
+    ] == [
+        ('2', 1, 13, 0),
+        ('3', 14, 26, -13)
+    ]
+
+
+def test_map_tvdb():
+    collection = MockCollection('tvdb', 'anidb')
+    item = build_item(collection)
+
+    AbsoluteMapper.map_episodes_tvdb(item, AbsoluteMapper.build_layout(*build_metadata()))
+
+    assert item.parameters == {'default_season': '1'}
+    assert sorted([
+        (season_num, season.parameters['episode_offset'])
+        for season_num, season in item.seasons.items()
+    ]) == [('1', 0), ('2', 13), ('3', 26)]
+
+
+def test_layout():
+    layout = AbsoluteMapper.build_layout(*build_metadata())
+
+    assert layout == (('1', 1, 13), ('2', 14, 13), ('3', 27, 13))
+
+    # Ensure episodes outside of the anidb item are excluded
+    assert AbsoluteMapper.build_layout(*build_metadata(), episode_offset=-13) == (('1', 14, 13), ('2', 27, 13))
+
+
+def test_layout_shared(mapper):
+    items = [
+        build_item(MockCollection('anidb', 'tvdb')),
+        build_item(MockCollection('tvdb', 'anidb'))
+    ]
+
+    for item in items:
+        assert AbsoluteMapper.process(item.collection, item) is True
+
+    # Ensure the layout was only computed once for both collections
+    assert AbsoluteMapper.build_layout.calls == 1
+
+    assert len(items[0].seasons['1'].mappings) == 3
+    assert sorted(items[1].seasons.keys()) == ['1', '2', '3']
+
+
+def test_layout_cleared(mapper):
+    item = build_item(MockCollection('anidb', 'tvdb'))
+
+    assert AbsoluteMapper.process(item.collection, item) is True
+    assert AbsoluteMapper.build_layout.calls == 1
+
+    # Ensure layouts are rebuilt (with the current metadata) once parser caches are cleared
+    mapper[1] = TVDbSummary(mapper[1].seasons[:2])
+
+    Parser.clear_caches()
+
+    item = build_item(MockCollection('anidb', 'tvdb'))
+
+    assert AbsoluteMapper.process(item.collection, item) is True
+    assert AbsoluteMapper.build_layout.calls == 2
+
+    assert len(item.seasons['1'].mappings) == 2
@@ -0,0 +1,43 @@
+from oem_database_updater_anidb.parsers.core.base import BaseParser
+from tests.core.mock import MockCollection
+
+
+def test_parse_episodes():
+    collection = MockCollection('anidb', 'tvdb')
+
+    assert list(BaseParser.parse_episodes(collection, ';1-5;2-6+7;0-1;')) == [
+        (('1', 0, 100), ('5', 0, 100)),
+        (('2', 0, 100), ('6', 0, 50)),
+        (('2', 0, 100), ('7', 50, 100))
+    ]
+
+
+def test_parse_episodes_reversed():
+    collection = MockCollection('tvdb', 'anidb')
+
+    assert list(BaseParser.parse_episodes(collection, ';1-5;2+3-6;4-0;')) == [
+        (('5', 0, 100), ('1', 0, 100)),
+        (('6', 0, 100), ('2', 0, 50)),
+        (('6', 0, 100), ('3', 50, 100))
+    ]
+
+
+def test_parse_episodes_split_thirds():
+    collection = MockCollection('anidb', 'tvdb')
+
+    assert list(BaseParser.parse_episodes(collection, '1-1+2+3')) == [
+        (('1', 0, 100), ('1', 0, 33)),
+        (('1', 0, 100), ('2', 33, 67)),
+        (('1', 0, 100), ('3', 67, 100))
+    ]
+
+
+def test_parse_episodes_cached():
+    collection = MockCollection('anidb', 'tvdb')
+
+    first = BaseParser.parse_episodes(collection, ';1-0;2-0;3-0;')
+    second = BaseParser.parse_episodes(MockCollection('anidb', 'imdb'), ';1-0;2-0;3-0;')
+
+    # Ensure parsed mappings are reused
+    assert first is second
+    assert BaseParser.parse_episodes(MockCollection('tvdb', 'anidb'), ';1-0;2-0;3-0;') is not first
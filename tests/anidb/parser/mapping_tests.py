@@ -4,6 +4,8 @@ from oem_core.models import Show
 from oem_database_updater_anidb.parsers import Parser
 
 from xml.etree import ElementTree
+import gc
+import weakref
 
 
 def test_absolute_season():
@@ -46,3 +48,56 @@ def test_invalid_show():
     assert Parser.parse_mappings(current, collection, [
         ElementTree.fromstring('<mapping anidbseason="1" tvdbseason="0">;1-0;2-0;3-0;</mapping>')
     ]) is False
+
+
+def test_shared_timelines():
+    collection = MockCollection('anidb', 'tvdb')
+
+    current = Show(
+        collection,
+        identifiers={
+            'anidb': 4597,
+            'tvdb': 79604
+        },
+        names=set([
+            'Black Lagoon: The Second Barrage'
+        ]),
+
+        default_season='1'
+    )
+
+    assert Parser.parse_mappings(current, collection, [
+        ElementTree.fromstring('<mapping anidbseason="0" tvdbseason="0">;1-5;2-6+7;3-8+9;</mapping>')
+    ]) is True
+
+    episodes = current.seasons['0'].episodes
+
+    # Ensure identical timelines are shared
+    assert episodes['2'].mappings[0].timeline is episodes['3'].mappings[0].timeline
+    assert episodes['2'].mappings[1].timeline is episodes['3'].mappings[1].timeline
+
+    assert episodes['2'].mappings[0].timeline['target'] is episodes['1'].mappings[0].timeline['target']
+    assert episodes['2'].mappings[0].timeline['source'] is not episodes['2'].mappings[1].timeline['source']
+
+    # Validate timelines
+    assert episodes['1'].mappings[0].timeline['source'].to_dict() == {}
+    assert episodes['2'].mappings[1].timeline['source'].to_dict() == {'start': 50}
+
+
+def test_caches_cleared():
+    collection = MockCollection('anidb', 'tvdb')
+    current = Show(collection, identifiers={'anidb': 4597, 'tvdb': 79604}, names=set(), default_season='1')
+
+    assert Parser.parse_mappings(current, collection, [
+        ElementTree.fromstring('<mapping anidbseason="0" tvdbseason="0">;1-5;2-6+7;</mapping>')
+    ]) is True
+
+    reference = weakref.ref(collection)
+
+    # Ensure collections aren't retained by the parser caches
+    Parser.clear_caches()
+
+    del collection, current
+    gc.collect()
+
+    assert reference() is None
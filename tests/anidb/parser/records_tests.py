@@ -0,0 +1,184 @@
+from oem_database_updater_anidb.main import AniDB
+from oem_database_updater_anidb.parsers import Parser
+from oem_database_updater_anidb.parsers.core.absolute import AbsoluteMapper
+from oem_database_updater_anidb.parsers.core.records import AnimeRecord
+from oem_database_updater_anidb.parsers.tvdb_ import TVDbParser
+from tests.core.generator import generate_anime_list
+from tests.core.helpers import create_collection, create_source
+
+from xml.etree import ElementTree
+import pickle
+
+NODE = '''<anime anidbid="3395" tvdbid="79604" imdbid="tt0835929" defaulttvdbseason="1" episodeoffset="">
+    <name>Black Lagoon</name>
+    <mapping-list>
+        <mapping anidbseason="0" tvdbseason="0">;1-13;</mapping>
+    </mapping-list>
+    <supplemental-info>
+        <studio>Madhouse</studio>
+    </supplemental-info>
+</anime>'''
+
+
+def test_record_construct():
+    collection = create_collection('anidb', 'tvdb')
+    node = ElementTree.fromstring(NODE)
+
+    records = list(Parser.parse_records(collection, node, use_absolute_mapper=False))
+    items = list(Parser.parse(collection, node, use_absolute_mapper=False))
+
+    assert len(records) == 1
+    assert records[0].identifiers == {'anidb': '3395', 'tvdb': '79604'}
+
+    # Ensure records construct the same item as the parser
+    assert records[0].construct().to_dict() == items[0].to_dict()
+
+
+def test_parse_many(monkeypatch):
+    collections = [
+        create_collection('anidb', 'imdb'),
+        None,
+        create_collection('anidb', 'tvdb'),
+        create_collection('tvdb', 'anidb')
+    ]
+
+    node = ElementTree.fromstring(NODE)
+
+    # Track node extraction
+    calls = []
+
+    def from_node(node):
+        calls.append(node)
+        return original(node)
+
+    original = AnimeRecord.from_node
+    monkeypatch.setattr(AnimeRecord, 'from_node', staticmethod(from_node))
+
+    results = Parser.parse_many(collections, node, use_absolute_mapper=False)
+
+    # Ensure node was only extracted once
+    assert len(calls) == 1
+
+    # Validate results
+    assert results[1] is None
+
+    assert [
+        [record.identifiers for record in records]
+        for records in results if records is not None
+    ] == [
+        [{'anidb': '3395', 'imdb': 'tt0835929'}],
+        [{'anidb': '3395', 'tvdb': '79604'}],
+        [{'anidb': '3395', 'tvdb': '79604'}]
+    ]
+
+    # Ensure records are constructed from the shared node record
+    assert results[0][0].anime is results[2][0].anime
+    assert results[2][0].construct().to_dict() == list(Parser.parse(collections[2], node, use_absolute_mapper=False))[0].to_dict()
+
+
+def test_record_hash():
+    collection = create_collection('anidb', 'tvdb')
+
+    first = list(Parser.parse_records(collection, ElementTree.fromstring(NODE)))[0]
+    second = list(Parser.parse_records(collection, ElementTree.fromstring(NODE)))[0]
+
+    assert first.hash() == second.hash()
+
+    # Ensure changes to the node are detected
+    changed = list(Parser.parse_records(collection, ElementTree.fromstring(
+        NODE.replace('Madhouse', 'Other')
+    )))[0]
+
+    assert changed.hash() != first.hash()
+
+
+def test_record_pickle():
+    collection = create_collection('anidb', 'tvdb')
+    record = list(Parser.parse_records(collection, ElementTree.fromstring(NODE)))[0]
+
+    # Remove collection (collections are bound by reference in workers)
+    record.collection = None
+
+    result = pickle.loads(pickle.dumps(record))
+
+    assert result.parser is TVDbParser
+    assert result.identifiers == record.identifiers
+    assert result.anime.digest() == record.anime.digest()
+
+
+def test_unchanged_items_not_constructed(tmpdir, monkeypatch):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+    collection = create_collection('anidb', 'tvdb')
+
+    assert AniDB.process_many([create_source(collection)], path) is True
+
+    # Track item construction
+    calls = []
+
+    def parse_one(record):
+        calls.append(record.identifiers['anidb'])
+        return original(record)
+
+    original = TVDbParser.parse_one
+    monkeypatch.setattr(TVDbParser, 'parse_one', staticmethod(parse_one))
+
+    # Process unchanged file
+    source = create_source(collection)
+
+    assert AniDB.process_many([source], path) is True
+
+    assert calls == []
+    assert source.count_updated == 0
+
+
+def test_record_copy_hash():
+    collection = create_collection('anidb', 'tvdb')
+    record = list(Parser.parse_records(collection, ElementTree.fromstring(NODE)))[0]
+
+    copy = record.copy({'anidb': '3396'})
+
+    # Ensure the base hash is shared between copies
+    assert copy.hash_base() is record.hash_base()
+
+    assert copy.identifiers == {'anidb': '3396', 'tvdb': '79604'}
+    assert copy.hash() != record.hash()
+    assert copy.copy({'anidb': '3395'}).hash() == record.hash()
+
+
+def test_group_hashing(tmpdir, monkeypatch):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 120, group_size=60)
+
+    # Track node digest calculations
+    calls = []
+
+    def digest(self):
+        if self._digest is None:
+            calls.append(self.attrib['anidbid'])
+
+        return original(self)
+
+    original = AnimeRecord.digest
+    monkeypatch.setattr(AnimeRecord, 'digest', digest)
+
+    source = create_source(create_collection('tvdb', 'anidb'))
+    assert AniDB.process_many([source], path) is True
+
+    # Ensure each node was only hashed once (merged items aren't re-hashed)
+    assert len(calls) == len(set(calls)) == 80
+    assert sorted(source.collection.items.keys()) == ['70000', '70001']
+
+
+def test_record_retry(monkeypatch):
+    monkeypatch.setattr(AbsoluteMapper, 'get_layout', classmethod(lambda cls, identifiers, episode_offset=None: None))
+
+    collection = create_collection('anidb', 'tvdb')
+    node = ElementTree.fromstring(NODE.replace('defaulttvdbseason="1"', 'defaulttvdbseason="a"'))
+
+    record = list(Parser.parse_records(collection, node))[0]
+
+    # Ensure records are retried when absolute mappings are unavailable
+    assert record.construct() is not None
+    assert record.retry is True
+
+    # Ensure the flag is sent back from worker processes
+    assert pickle.loads(pickle.dumps(record)).retry is True
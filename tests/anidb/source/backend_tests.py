@@ -0,0 +1,78 @@
+from oem_database_updater_anidb.core.backend import BACKENDS, XmlBackend
+from oem_database_updater_anidb.core.mapped import MappedSource
+from oem_database_updater_anidb.main import AniDB
+from tests.core.generator import generate_anime_list
+from tests.core.helpers import create_collection, create_source, process
+
+import pytest
+
+
+@pytest.fixture(params=sorted(BACKENDS.keys()))
+def backend(request):
+    backend = BACKENDS[request.param]
+
+    if not backend.available():
+        pytest.skip('%r backend is not available' % request.param)
+
+    request.addfinalizer(lambda: XmlBackend.configure())
+    return XmlBackend.configure(request.param)
+
+
+def test_fromstring(tmpdir, backend):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    with MappedSource(path) as source:
+        nodes = [
+            backend.fromstring(element.data())
+            for element in source.iter_elements()
+        ]
+
+    assert len(nodes) == 30
+
+    for node in nodes:
+        assert node.tag == 'anime'
+        assert node.find('name').text.startswith('Generated ')
+
+    assert [
+        (dict(node.attrib), len(node.findall('mapping-list//mapping')))
+        for node in nodes[:3]
+    ] == [
+        ({'anidbid': '1', 'tvdbid': '70000', 'defaulttvdbseason': '1'}, 1),
+        ({'anidbid': '2', 'tvdbid': '70000', 'defaulttvdbseason': '0', 'episodeoffset': '2'}, 2),
+        ({'anidbid': '3', 'tvdbid': 'movie', 'defaulttvdbseason': '1', 'tmdbid': '1002', 'tmdbmid': '1002',
+          'imdbid': 'tt0100002'}, 0)
+    ]
+
+
+def test_process_matches(tmpdir, backend):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 60)
+
+    expected = process(path, **{'xml-backend': 'etree'})
+    actual = process(path, **{'xml-backend': backend.__key__})
+
+    assert XmlBackend.current() is backend
+
+    for e, a in zip(expected, actual):
+        assert sorted(a.collection.items.keys()) == sorted(e.collection.items.keys())
+
+        for key, metadata in e.collection.items.items():
+            assert a.collection.items[key].hashes == metadata.hashes
+
+
+def test_invalid_backend(tmpdir):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 3)
+
+    sources = [create_source(create_collection('anidb', 'tvdb'), **{'xml-backend': 'other'})]
+
+    assert AniDB.process_many(sources, path) is False
+
+
+def test_auto_backend():
+    backend = XmlBackend.get('auto')
+
+    if BACKENDS['lxml'].available():
+        assert backend is BACKENDS['lxml']
+    else:
+        assert backend is BACKENDS['etree']
+
+    assert XmlBackend.get() is backend
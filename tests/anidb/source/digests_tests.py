@@ -0,0 +1,130 @@
+from oem_database_updater_anidb.metadata.anidb_ import AniDbMetadata
+from oem_database_updater_anidb.metadata.tmdb_ import TMDbMetadata
+from oem_database_updater_anidb.parsers.core import records
+from tests.core.generator import generate_anime_list
+from tests.core.helpers import create_collection, process
+from tests.core.mock import MockMetadata
+
+import io
+
+
+def test_unchanged_items_skipped(tmpdir, parsed):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+    directory = str(tmpdir.join('digests'))
+
+    collections = [
+        create_collection('anidb', 'tvdb'),
+        create_collection('tvdb', 'anidb')
+    ]
+
+    # Initial run
+    process(path, collections, digests=directory)
+
+    assert len(parsed) == 60
+
+    # Unchanged run
+    del parsed[:]
+
+    sources = process(path, collections, digests=directory)
+
+    assert len(parsed) == 0
+    assert sources[0].count_total == 30
+    assert sources[0].count_updated == 0
+
+
+def test_changed_groups_processed(tmpdir, parsed):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+    directory = str(tmpdir.join('digests'))
+
+    collections = [
+        create_collection('anidb', 'tvdb'),
+        create_collection('tvdb', 'anidb')
+    ]
+
+    # Initial run
+    process(path, collections, digests=directory)
+
+    # Update the name of item "4"
+    with io.open(path, 'r', encoding='utf-8') as fp:
+        data = fp.read()
+
+    with io.open(path, 'w', encoding='utf-8') as fp:
+        fp.write(data.replace('Generated Show 4<', 'Generated Show 4 (Updated)<'))
+
+    # Incremental run
+    del parsed[:]
+
+    process(path, collections, digests=directory)
+
+    # Ensure only the changed item (and the items merged with it) were parsed
+    assert sorted([anidb_id for source, anidb_id in parsed if source == 'anidb']) == ['4']
+    assert sorted([anidb_id for source, anidb_id in parsed if source == 'tvdb']) == ['4', '5']
+
+
+def test_hash_version_changed(tmpdir, parsed, monkeypatch):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+    directory = str(tmpdir.join('digests'))
+
+    collections = [create_collection('anidb', 'tvdb')]
+
+    # Initial run
+    process(path, collections, digests=directory)
+
+    # Ensure all items are processed when the item hash format changes
+    monkeypatch.setattr(records, 'VERSION', records.VERSION + 1)
+
+    del parsed[:]
+
+    process(path, collections, digests=directory)
+
+    assert len(parsed) == 30
+
+
+def test_failed_writes_processed(tmpdir, parsed, monkeypatch):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+    directory = str(tmpdir.join('digests'))
+
+    # Initial run (with failed writes)
+    with monkeypatch.context() as patch:
+        patch.setattr(MockMetadata, 'update', lambda self, item, hash_key, hash: False)
+
+        process(path, [create_collection('anidb', 'tvdb')], digests=directory)
+
+    # Ensure all items are processed again
+    del parsed[:]
+
+    process(path, [create_collection('anidb', 'tvdb')], digests=directory)
+
+    assert len(parsed) == 30
+
+
+def test_failed_fetches_processed(tmpdir, monkeypatch):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 3)
+    directory = str(tmpdir.join('digests'))
+
+    for metadata in [AniDbMetadata, TMDbMetadata]:
+        monkeypatch.setattr(metadata, 'cache', {})
+        monkeypatch.setattr(metadata, 'limiter', None)
+
+    monkeypatch.setattr(TMDbMetadata, '_fetch', classmethod(
+        lambda cls, tmdb_id, media: cls.set_cached((media, tmdb_id), True)
+    ))
+
+    # Initial run (with AniDB unavailable)
+    monkeypatch.setattr(AniDbMetadata, '_fetch', classmethod(
+        lambda cls, anidb_id: cls.set_cached(anidb_id, None, persist=False)
+    ))
+
+    sources = process(path, [create_collection('anidb', 'tmdb:movie')], digests=directory, cache='off')
+
+    assert sources[0].collection.items == {}
+
+    # Ensure items are processed again once AniDB is available
+    monkeypatch.setattr(AniDbMetadata, 'cache', {})
+    monkeypatch.setattr(AniDbMetadata, '_fetch', classmethod(
+        lambda cls, anidb_id: cls.set_cached(anidb_id, True)
+    ))
+
+    sources = process(path, [create_collection('anidb', 'tmdb:movie')], digests=directory, cache='off')
+
+    assert sorted(sources[0].collection.items.keys()) == ['3']
@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+DEFERRED_MODULES = ['anidb', 'appdirs', 'lxml', 'requests', 'tmdbsimple', 'tvdb_api']
+
+
+def test_deferred_imports():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(sys.path)
+
+    # Import updater in a new interpreter (modules may have been loaded by other tests)
+    output = subprocess.check_output([sys.executable, '-c', '; '.join([
+        'import sys',
+        'from oem_database_updater_anidb.main import AniDB',
+        'print(",".join(sorted(set(sys.modules) & set(%r))))' % DEFERRED_MODULES
+    ])], env=env)
+
+    # Ensure metadata clients weren't imported
+    assert output.decode('utf-8').strip() == ''
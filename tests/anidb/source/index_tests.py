@@ -0,0 +1,63 @@
+from oem_database_updater_anidb.core.index import IdentifierIndex
+from tests.core.generator import generate_anime_list
+
+import io
+import pytest
+
+
+@pytest.fixture
+def index(tmpdir):
+    return IdentifierIndex.build(generate_anime_list(str(tmpdir.join('anime-list.xml')), 30))
+
+
+def test_lookup(index):
+    nodes = index.lookup('anidb', '5')
+
+    assert len(nodes) == 1
+    assert nodes[0].attrib['tvdbid'] == '70001'
+    assert nodes[0].find('name').text == 'Generated Special 5'
+
+    # Ensure child elements were read
+    assert len(nodes[0].findall('mapping-list//mapping')) == 2
+
+
+def test_lookup_services(index):
+    assert [node.attrib['anidbid'] for node in index.lookup('tvdb', '70001')] == ['4', '5']
+    assert [node.attrib['anidbid'] for node in index.lookup('tmdb:movie', '1002')] == ['3']
+    assert [node.attrib['anidbid'] for node in index.lookup('imdb', 'tt0100005')] == ['6']
+
+    # Ensure "movie" identifiers aren't indexed as keys
+    assert index.lookup('tvdb', 'unknown') == []
+    assert index.lookup('anidb', '1000') == []
+
+
+def test_lookup_unknown_service(index):
+    with pytest.raises(ValueError):
+        index.get('other', '1')
+
+
+def test_group(index):
+    offsets = index.get_group('tvdb', ['70000', '70001'])
+
+    assert offsets == sorted(offsets)
+    assert [node.attrib['anidbid'] for node in index.iter_nodes(offsets)] == ['1', '2', '4', '5']
+
+
+def test_self_closing(tmpdir):
+    path = str(tmpdir.join('anime-list.xml'))
+
+    with io.open(path, 'w', encoding='utf-8') as fp:
+        fp.write(
+            u'<anime-list>\n'
+            u'  <anime anidbid="1" tvdbid="10"/>\n'
+            u'  <anime anidbid="2" tvdbid="10">\n'
+            u'    <name>Second &amp; Last</name>\n'
+            u'  </anime>\n'
+            u'</anime-list>\n'
+        )
+
+    index = IdentifierIndex.build(path)
+    nodes = index.lookup('tvdb', '10')
+
+    assert [node.attrib['anidbid'] for node in nodes] == ['1', '2']
+    assert nodes[1].find('name').text == 'Second & Last'
@@ -0,0 +1,140 @@
+from oem_database_updater_anidb.core.index import IdentifierIndex
+from oem_database_updater_anidb.core.mapped import MappedSource
+from oem_database_updater_anidb.core.scanner import iter_attributes
+from tests.core.generator import generate_anime_list
+
+from xml.etree import ElementTree
+import io
+import pytest
+
+
+def test_elements_match_parser(tmpdir):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    with MappedSource(path) as source:
+        elements = list(source.iter_elements())
+
+        assert len(elements) == 30
+
+        for element, node in zip(elements, ElementTree.parse(path).getroot().findall('anime')):
+            assert element.attrib == node.attrib
+
+            # Ignore whitespace following the element
+            node.tail = None
+
+            assert ElementTree.tostring(element.parse()) == ElementTree.tostring(node)
+
+
+def test_element_at(tmpdir):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    with MappedSource(path) as source:
+        elements = list(source.iter_elements())
+
+        element = source.element_at(elements[4].start)
+
+        assert element.attrib['anidbid'] == '5'
+        assert element.data() == elements[4].data()
+        assert element.data().startswith(b'<anime ') and element.data().endswith(b'</anime>')
+
+        with pytest.raises(ValueError):
+            source.element_at(elements[4].start + 1)
+
+
+def test_ranges(tmpdir):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    with MappedSource(path) as source:
+        size = len(source.data)
+
+        # Split source into ranges (boundaries are placed inside elements)
+        boundaries = [0, size // 3, (size * 2) // 3, size]
+
+        ranges = [
+            [element.attrib['anidbid'] for element in source.iter_elements(start, end)]
+            for start, end in zip(boundaries[:-1], boundaries[1:])
+        ]
+
+        # Ensure each element is only included in one range
+        assert all(ranges)
+        assert sum(ranges, []) == [str(x + 1) for x in range(30)]
+
+
+def test_self_closing(tmpdir):
+    path = str(tmpdir.join('anime-list.xml'))
+
+    with io.open(path, 'w', encoding='utf-8') as fp:
+        fp.write(
+            u'<anime-list>\n'
+            u'  <anime anidbid="1" tvdbid="10"/>\n'
+            u'  <anime anidbid="2" tvdbid="&quot;10&quot;">\n'
+            u'    <name>Second</name>\n'
+            u'  </anime>\n'
+            u'</anime-list>\n'
+        )
+
+    with MappedSource(path) as source:
+        elements = list(source.iter_elements())
+
+        assert [element.attrib for element in elements] == [
+            {'anidbid': '1', 'tvdbid': '10'},
+            {'anidbid': '2', 'tvdbid': '"10"'}
+        ]
+
+        assert elements[0].parse().attrib == {'anidbid': '1', 'tvdbid': '10'}
+        assert elements[1].parse().find('name').text == 'Second'
+
+
+def test_empty(tmpdir):
+    path = str(tmpdir.join('anime-list.xml'))
+
+    io.open(path, 'wb').close()
+
+    with MappedSource(path) as source:
+        assert list(source.iter_elements()) == []
+
+
+def test_comments(tmpdir):
+    path = str(tmpdir.join('anime-list.xml'))
+
+    with io.open(path, 'w', encoding='utf-8') as fp:
+        fp.write(
+            u'<anime-list>\n'
+            u'  <!-- <anime anidbid="999" tvdbid="999"><name>Removed</name></anime> -->\n'
+            u'  <anime anidbid="1" tvdbid="10">\n'
+            u'    <name>First</name>\n'
+            u'    <!-- </anime> -->\n'
+            u'    <supplemental-info><studio><![CDATA[</anime><anime anidbid="998">]]></studio></supplemental-info>\n'
+            u'  </anime>\n'
+            u'  <![CDATA[<anime anidbid="997"/>]]>\n'
+            u'  <anime anidbid="2" tvdbid="x&#39;y&#x22;z"/>\n'
+            u'</anime-list>\n'
+        )
+
+    expected = [node.attrib for node in ElementTree.parse(path).getroot().findall('anime')]
+
+    # Ensure commented-out elements (and CDATA sections) are skipped
+    with MappedSource(path) as source:
+        elements = list(source.iter_elements())
+
+        assert [element.attrib for element in elements] == expected
+        assert [element.attrib['anidbid'] for element in elements] == ['1', '2']
+
+        assert elements[0].parse().find('supplemental-info/studio').text == '</anime><anime anidbid="998">'
+        assert elements[1].attrib['tvdbid'] == 'x\'y"z'
+
+    assert [
+        (offset, attrib['anidbid'])
+        for offset, attrib in iter_attributes(path)
+    ] == [
+        (element.start, element.attrib['anidbid'])
+        for element in elements
+    ]
+
+    # Ensure nodes are read from the index without the mapped source
+    index = IdentifierIndex.build(path)
+
+    assert [node.attrib['anidbid'] for node in index.lookup('anidb', '1')] == ['1']
+    assert index.get('anidb', '999') == []
+
+    index.close()
@@ -0,0 +1,90 @@
+from oem_database_updater_anidb.core.profiler import Profiler, percentile
+from oem_framework.core.elapsed import Elapsed
+from tests.core.generator import generate_anime_list
+from tests.core.helpers import create_collection, create_source
+
+import io
+import time
+
+
+@Profiler.stage('fetch')
+def fetch():
+    time.sleep(0.05)
+
+
+@Profiler.stage('parse')
+def parse():
+    time.sleep(0.01)
+    fetch()
+
+
+def test_percentile():
+    assert percentile([], 0.95) == 0
+    assert percentile([5], 0.95) == 5
+    assert percentile(list(range(1, 101)), 0.95) == 95
+
+
+def test_stages():
+    profiler = Profiler().start()
+
+    try:
+        parse()
+    finally:
+        profiler.stop()
+
+    stages = dict(profiler.get_stages())
+
+    # Ensure nested stages are excluded from the outer stage
+    assert stages['parse']['count'] == 1
+    assert stages['fetch']['count'] == 1
+
+    assert stages['parse']['total'] < 40
+    assert stages['fetch']['total'] >= 50
+
+    assert sum([statistics['total'] for statistics in stages.values()]) <= profiler.elapsed
+
+    # Ensure calls aren't measured once the profiler has stopped
+    parse()
+
+    assert dict(profiler.get_stages())['parse']['count'] == 1
+
+
+def test_offsets(monkeypatch):
+    monkeypatch.setattr(Elapsed, 'samples', {
+        'AniDB.process_one': {'success': [1, 2], 'failure': [3]}
+    })
+
+    profiler = Profiler().start()
+    profiler.stop()
+
+    Elapsed.samples['AniDB.process_one']['success'].append(4)
+
+    # Ensure samples are offset by the counts of each result
+    assert profiler.get_samples('AniDB.process_one') == [4]
+
+
+def test_report(tmpdir):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+    report_path = str(tmpdir.join('profile.txt'))
+
+    source = create_source(create_collection('tvdb', 'anidb'), profile=report_path)
+    assert source.process(path) is True
+
+    with io.open(report_path, 'r', encoding='utf-8') as fp:
+        report = fp.read()
+
+    lines = dict([
+        (line.split()[0], line.split()[1:])
+        for line in report.split('\n')
+        if line.strip()
+    ])
+
+    # Validate function statistics
+    assert lines['AniDB.process_one'][0] == '30'
+    assert lines['TVDbParser.parse_one'][0] == '20'
+
+    # Validate stage statistics
+    assert lines['record'][0] == '30'
+    assert lines['parse'][0] == '20'
+    assert lines['hash'][0] == '20'
+    assert lines['fetch'][0] == '0'
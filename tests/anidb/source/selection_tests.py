@@ -0,0 +1,82 @@
+from oem_database_updater_anidb.core.selection import parse_selectors
+from oem_database_updater_anidb.main import AniDB
+from tests.core.generator import generate_anime_list
+from tests.core.helpers import create_collection, create_source, process
+
+import io
+import pytest
+
+
+def update_name(path, anidb_id):
+    with io.open(path, 'r', encoding='utf-8') as fp:
+        data = fp.read()
+
+    with io.open(path, 'w', encoding='utf-8') as fp:
+        fp.write(data.replace('Generated Special %d<' % anidb_id, 'Generated Special %d (Updated)<' % anidb_id))
+
+
+def test_parse_selectors():
+    assert parse_selectors('anidb:1530, tvdb:79604,1234') == [
+        ('anidb', '1530'),
+        ('tvdb', '79604'),
+        ('anidb', '1234')
+    ]
+
+    assert parse_selectors('tmdb:movie:1234') == [('tmdb:movie', '1234')]
+
+    with pytest.raises(ValueError):
+        parse_selectors('other:1234')
+
+    with pytest.raises(ValueError):
+        parse_selectors(' , ')
+
+
+def test_targeted_rebuild(tmpdir, parsed):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    collections = [
+        create_collection('anidb', 'tvdb'),
+        create_collection('tvdb', 'anidb')
+    ]
+
+    # Initial run
+    process(path, collections)
+
+    # Update the name of item "5", then rebuild it
+    update_name(path, 5)
+
+    del parsed[:]
+
+    sources = process(path, collections, only='anidb:5')
+
+    # Ensure only the selected item (and the items merged with it) were parsed
+    assert sorted([anidb_id for source, anidb_id in parsed if source == 'anidb']) == ['5']
+    assert sorted([anidb_id for source, anidb_id in parsed if source == 'tvdb']) == ['4', '5']
+
+    assert sources[0].count_updated == 1
+    assert sources[1].count_updated == 1
+
+    # Ensure results match a full run
+    expected = [create_collection('anidb', 'tvdb'), create_collection('tvdb', 'anidb')]
+    process(path, expected)
+
+    for actual, full in zip(collections, expected):
+        assert sorted(actual.items.keys()) == sorted(full.items.keys())
+
+        for key, metadata in full.items.items():
+            assert actual.items[key].hashes == metadata.hashes
+
+
+def test_targeted_rebuild_service_key(tmpdir, parsed):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+
+    sources = process(path, only='tvdb:70001')
+
+    assert sorted(sources[0].collection.items.keys()) == ['4', '5']
+    assert sorted(sources[1].collection.items.keys()) == ['70001']
+
+
+def test_targeted_rebuild_invalid(tmpdir):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 3)
+
+    assert AniDB.process_many([create_source(create_collection('anidb', 'tvdb'), only='other:1')], path) is False
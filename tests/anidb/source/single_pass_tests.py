@@ -0,0 +1,149 @@
+from oem_database_updater_anidb.core.mapped import MappedSource
+from oem_database_updater_anidb.main import AniDB
+from tests.core.helpers import create_collection, create_source
+
+import gc
+import os
+import pytest
+import weakref
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'merge', 'fixtures')
+
+
+@pytest.fixture
+def iterations(monkeypatch):
+    calls = []
+
+    def iter_elements(self, *args, **kwargs):
+        calls.append(self.path)
+        return original(self, *args, **kwargs)
+
+    original = MappedSource.iter_elements
+
+    monkeypatch.setattr(MappedSource, 'iter_elements', iter_elements)
+    monkeypatch.setattr(AniDB, 'pending', weakref.WeakSet())
+
+    return calls
+
+
+def test_run(iterations):
+    path = os.path.join(FIXTURES_DIR, 'black-lagoon.xml')
+
+    sources = [
+        create_source(create_collection('anidb', 'tvdb'), source=path),
+        create_source(create_collection('tvdb', 'anidb'), source=path)
+    ]
+
+    # Ensure the first run processes all collections that share the source file
+    assert sources[0].run() is True
+    assert iterations == [path]
+
+    assert set(sources[0].collection.items.keys()) == set(['3395', '4597', '6645'])
+    assert set(sources[1].collection.items.keys()) == set(['79604'])
+
+    # Ensure later runs are skipped
+    assert sources[1].run() is True
+    assert iterations == [path]
+
+    assert sources[1].count_total == 3
+    assert len(AniDB.pending) == 0
+
+
+def test_run_separate_sources(iterations):
+    paths = [
+        os.path.join(FIXTURES_DIR, 'black-lagoon.xml'),
+        os.path.join(FIXTURES_DIR, 'gall-force.xml')
+    ]
+
+    sources = [
+        create_source(create_collection('anidb', 'tvdb'), source=paths[0]),
+        create_source(create_collection('anidb', 'tvdb'), source=paths[1])
+    ]
+
+    # Ensure collections with different source files are processed separately
+    assert sources[0].run() is True
+    assert iterations == [paths[0]]
+
+    assert sources[1].run() is True
+    assert iterations == paths
+
+
+def test_run_sequential(iterations):
+    path = os.path.join(FIXTURES_DIR, 'black-lagoon.xml')
+
+    # Ensure sources constructed after the first run are still processed
+    first = create_source(create_collection('anidb', 'tvdb'), source=path)
+    assert first.run() is True
+
+    second = create_source(create_collection('tvdb', 'anidb'), source=path)
+    assert second.run() is True
+
+    assert iterations == [path, path]
+    assert set(second.collection.items.keys()) == set(['79604'])
+
+
+def test_process_releases_source(iterations):
+    path = os.path.join(FIXTURES_DIR, 'black-lagoon.xml')
+
+    source = create_source(create_collection('anidb', 'tvdb'))
+    assert source.process(path) is True
+
+    # Ensure sources processed outside of `run()` aren't retained
+    assert len(AniDB.pending) == 0
+
+    reference = weakref.ref(source)
+    del source
+
+    gc.collect()
+
+    assert reference() is None
+
+
+def test_single_pass(monkeypatch):
+    calls = []
+
+    def iter_elements(self, *args, **kwargs):
+        calls.append(args)
+        return original(self, *args, **kwargs)
+
+    original = MappedSource.iter_elements
+    monkeypatch.setattr(MappedSource, 'iter_elements', iter_elements)
+
+    sources = [
+        create_source(create_collection('anidb', 'tvdb')),
+        create_source(create_collection('tvdb', 'anidb'))
+    ]
+
+    assert AniDB.process_many(sources, os.path.join(FIXTURES_DIR, 'black-lagoon.xml')) is True
+
+    # Ensure the source file was only parsed once
+    assert len(calls) == 1
+
+    # Validate collections
+    assert set(sources[0].collection.items.keys()) == set(['3395', '4597', '6645'])
+    assert set(sources[1].collection.items.keys()) == set(['79604'])
+
+    assert sources[0].count_total == 3
+    assert sources[1].count_total == 3
+
+
+def test_single_pass_matches_separate_runs():
+    path = os.path.join(FIXTURES_DIR, 'gall-force.xml')
+
+    # Process collections separately
+    separate = create_source(create_collection('tvdb', 'anidb'))
+    assert separate.process(path) is True
+
+    # Process collections in a single pass
+    combined = [
+        create_source(create_collection('anidb', 'tvdb')),
+        create_source(create_collection('tvdb', 'anidb'))
+    ]
+    assert AniDB.process_many(combined, path) is True
+
+    # Validate results match
+    expected = separate.collection.items['138691']
+    actual = combined[1].collection.items['138691']
+
+    assert actual.hashes == expected.hashes
+    assert actual.item.to_dict() == expected.item.to_dict()
@@ -0,0 +1,44 @@
+from oem_database_updater_anidb.core.mapped import MappedSource
+from oem_database_updater_anidb.main import AniDB
+from tests.core.generator import generate_anime_list
+from tests.core.helpers import create_collection, create_source
+
+import pytest
+
+
+def measure_peak(path):
+    tracemalloc = pytest.importorskip('tracemalloc')
+
+    sources = [
+        create_source(create_collection('anidb', 'tvdb')),
+        create_source(create_collection('tvdb', 'anidb'))
+    ]
+
+    tracemalloc.start()
+
+    try:
+        count = 0
+
+        with MappedSource(path) as mapped:
+            # Read and parse nodes (with the same pipeline used by `AniDB.process_many`)
+            for node, parsed in AniDB.iter_parsed(sources, mapped.iter_elements()):
+                assert len(parsed) == 2
+                count += 1
+
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return count, peak
+
+
+def test_memory_ceiling(tmpdir):
+    small_count, small_peak = measure_peak(generate_anime_list(str(tmpdir.join('small.xml')), 2000))
+    large_count, large_peak = measure_peak(generate_anime_list(str(tmpdir.join('large.xml')), 20000))
+
+    assert small_count == 2000
+    assert large_count == 20000
+
+    # Ensure peak memory doesn't grow with the size of the source file
+    assert large_peak < small_peak * 1.5
+    assert large_peak < 4 * 1024 * 1024
@@ -0,0 +1,72 @@
+from oem_database_updater_anidb.core.workers import ParserPool
+from oem_database_updater_anidb.main import AniDB
+from oem_database_updater_anidb.metadata.prefetch import Prefetcher
+from oem_database_updater_anidb.parsers.core.records import ItemRecord
+from tests.core.generator import generate_anime_list
+from tests.core.helpers import create_collection, create_source, process
+
+
+def test_workers_match_serial(tmpdir):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 300)
+
+    serial = process(path)
+    parallel = process(path, workers='2')
+
+    for expected, actual in zip(serial, parallel):
+        assert set(actual.collection.items.keys()) == set(expected.collection.items.keys())
+
+        for key, metadata in expected.collection.items.items():
+            assert actual.collection.items[key].hashes == metadata.hashes
+
+            # Ensure parsed items were bound to the main process collection
+            assert actual.collection.items[key].item.collection is actual.collection
+
+
+def test_workers_started_before_prefetcher(tmpdir, monkeypatch):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 30)
+    started = []
+
+    def recorder(cls, name):
+        start = cls.start
+
+        def wrapper(self):
+            started.append(name)
+            return start(self)
+
+        monkeypatch.setattr(cls, 'start', wrapper)
+
+    recorder(ParserPool, 'workers')
+    recorder(Prefetcher, 'prefetcher')
+
+    process(path, [create_collection('anidb', 'tvdb')], workers='2', prefetch='8', cache='off')
+
+    # Ensure worker processes are forked before any prefetch threads are started
+    assert started[:2] == ['workers', 'prefetcher']
+
+
+def test_workers_hash_records(tmpdir, monkeypatch):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 60)
+    calls = []
+
+    def hash_base(record):
+        calls.append(record)
+        return original(record)
+
+    sources = [
+        create_source(create_collection('anidb', 'tvdb'), workers='2'),
+        create_source(create_collection('tvdb', 'anidb'), workers='2')
+    ]
+
+    # Record calls made by the main process (workers are forked before the method is replaced)
+    pool = AniDB.start_pool(sources)
+
+    original = ItemRecord.hash_base
+
+    monkeypatch.setattr(ItemRecord, 'hash_base', hash_base)
+    monkeypatch.setattr(AniDB, 'start_pool', staticmethod(lambda sources: pool))
+
+    assert AniDB.process_many(sources, path) is True
+
+    # Ensure records were hashed by the workers
+    assert calls == []
+    assert len(sources[0].collection.items) > 0
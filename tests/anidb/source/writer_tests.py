@@ -0,0 +1,78 @@
+from oem_database_updater_anidb.core.writer import MetadataWriter
+from tests.core.generator import generate_anime_list
+from tests.core.helpers import create_collection, process
+from tests.core.mock import MockMetadata
+
+import pytest
+
+
+def test_write_coalesced():
+    collection = create_collection('tvdb', 'anidb')
+    writer = MetadataWriter(collection, batch_size=0)
+
+    # Queue writes for a merged item
+    metadata = writer.create('tvdb', '70000')
+
+    writer.write('tvdb', '70000', metadata, 'first', '1', 'a')
+    writer.write('tvdb', '70000', writer.get('70000'), 'second', '2', 'b')
+
+    # Ensure writes are buffered
+    assert collection.items == {}
+    assert writer.get('70000') is metadata
+
+    # Flush writes
+    assert writer.flush() is True
+
+    assert collection.items == {'70000': metadata}
+    assert metadata.item == 'second'
+    assert metadata.hashes == {'1': 'a', '2': 'b'}
+    assert metadata.writes == 1
+
+
+def test_write_batches():
+    collection = create_collection('tvdb', 'anidb')
+    writer = MetadataWriter(collection, batch_size=2)
+
+    for key in ['1', '2', '3']:
+        writer.write('tvdb', key, writer.create('tvdb', key), key, '1', key)
+
+    # Ensure the first batch was flushed
+    assert sorted(collection.items.keys()) == ['1', '2']
+
+    writer.flush()
+
+    assert sorted(collection.items.keys()) == ['1', '2', '3']
+
+
+def test_write_failed(monkeypatch):
+    collection = create_collection('tvdb', 'anidb')
+    writer = MetadataWriter(collection, batch_size=0)
+
+    monkeypatch.setattr(MockMetadata, 'update', lambda self, item, hash_key, hash: False)
+
+    writer.write('tvdb', '1', writer.create('tvdb', '1'), '1', '1', 'a')
+
+    # Ensure failed writes are reported
+    assert writer.flush() is False
+    assert writer.count_failed == 1
+
+
+@pytest.mark.parametrize('batch_size', ['0', '7'])
+def test_batched_matches_unbatched(tmpdir, batch_size):
+    path = generate_anime_list(str(tmpdir.join('anime-list.xml')), 60)
+
+    expected = process(path, **{'write-batch-size': '1'})
+    actual = process(path, **{'write-batch-size': batch_size})
+
+    for e, a in zip(expected, actual):
+        assert sorted(a.collection.items.keys()) == sorted(e.collection.items.keys())
+
+        for key, metadata in e.collection.items.items():
+            assert a.collection.items[key].hashes == metadata.hashes
+            assert a.collection.items[key].item.to_dict() == metadata.item.to_dict()
+
+    # Ensure merged items were only written once (when flushed at the end of the run)
+    assert max([metadata.writes for metadata in expected[1].collection.items.values()]) == 2
+
+    if batch_size == '0':
+        assert max([metadata.writes for metadata in actual[1].collection.items.values()]) == 1
@@ -0,0 +1,103 @@
+from tests.core.generator import generate_anime_list
+
+import atexit
+import io
+import json
+import os
+import shutil
+import six
+import tempfile
+import timeit
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    def wrapper(func):
+        BENCHMARKS.append((name, func))
+        return func
+
+    return wrapper
+
+
+class Context(object):
+    def __init__(self, count):
+        self.count = count
+
+        self.directory = None
+        self.paths = {}
+
+    def anime_list(self, count=None, group_size=3):
+        count = count or self.count
+        key = (count, group_size)
+
+        if key in self.paths:
+            return self.paths[key]
+
+        # Create temporary directory
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix='oem-anidb-benchmark-')
+            atexit.register(shutil.rmtree, self.directory, True)
+
+        # Generate anime list
+        self.paths[key] = generate_anime_list(
+            os.path.join(self.directory, 'anime-list-%d-%d.xml' % key),
+            count, group_size
+        )
+        return self.paths[key]
+
+
+def run(names=None, count=2000, repeat=5):
+    context = Context(count)
+    results = {}
+
+    for name, setup in BENCHMARKS:
+        if names and not any([name.startswith(n) for n in names]):
+            continue
+
+        # Setup benchmark
+        func, operations = setup(context)
+
+        # Time benchmark
+        samples = []
+
+        for _ in range(repeat):
+            started_at = timeit.default_timer()
+            func()
+            samples.append(timeit.default_timer() - started_at)
+
+        results[name] = {
+            'operations': operations,
+            'best': min(samples),
+            'mean': sum(samples) / len(samples)
+        }
+
+        yield name, results[name]
+
+
+def load(path):
+    with io.open(path, 'r', encoding='utf-8') as fp:
+        return json.load(fp)
+
+
+def save(path, results):
+    data = json.dumps(results, indent=4, sort_keys=True)
+
+    with io.open(path, 'w', encoding='utf-8') as fp:
+        fp.write(six.text_type(data))
+
+
+def compare(baseline, results, threshold=0.2):
+    regressions = []
+
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+
+        expected = baseline[name]['best'] / baseline[name]['operations']
+        actual = result['best'] / result['operations']
+
+        if actual > expected * (1 + threshold):
+            regressions.append((name, expected, actual))
+
+    return regressions
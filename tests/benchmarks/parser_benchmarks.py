@@ -0,0 +1,110 @@
+from oem_database_updater_anidb.metadata.anidb_ import AniDbMetadata
+from oem_database_updater_anidb.metadata.core.cache import MetadataCache
+from oem_database_updater_anidb.metadata.tmdb_ import TMDbMetadata
+from oem_database_updater_anidb.parsers import Parser
+from oem_database_updater_anidb.parsers.core.base import BaseParser
+from tests.benchmarks.core import benchmark
+from tests.core.helpers import create_collection
+
+from oem_core.models import Show
+from xml.etree import ElementTree
+
+EPISODE_MAPPINGS = [
+    ';1-0;2-0;3-0;4-0;5-0;',
+    ';1-5;2-6;3-7;',
+    ';1-1+2;2-3;3-4;4-5+6+7;',
+    ';1-13;2-14;3-15;4-16;5-17;6-18;7-19;8-20;9-21;10-22;11-23;12-24;'
+]
+
+COLLECTIONS = [
+    ('anidb', 'imdb'),
+    ('imdb', 'anidb'),
+    ('anidb', 'tmdb:movie'),
+    ('tmdb:movie', 'anidb'),
+    ('anidb', 'tvdb'),
+    ('tvdb', 'anidb')
+]
+
+
+def prime_metadata(nodes):
+    MetadataCache.configure(enabled=False)
+
+    # Populate metadata caches (benchmarks shouldn't make remote requests)
+    for node in nodes:
+        AniDbMetadata.cache[node.attrib.get('anidbid')] = True
+
+        for key, media in [('tmdbmid', 'movie'), ('tmdbsid', 'show')]:
+            if key in node.attrib:
+                TMDbMetadata.cache[(media, node.attrib[key])] = True
+
+
+@benchmark('parser.parse_episodes')
+def parse_episodes(context):
+    collection = create_collection('anidb', 'tvdb')
+    values = EPISODE_MAPPINGS * (context.count // len(EPISODE_MAPPINGS))
+
+    def run():
+        for value in values:
+            for _ in BaseParser.parse_episodes(collection, value):
+                pass
+
+    return run, len(values)
+
+
+@benchmark('parser.parse_mappings')
+def parse_mappings(context):
+    collection = create_collection('tvdb', 'anidb')
+
+    mappings = [
+        ElementTree.fromstring('<mapping anidbseason="1" tvdbseason="1">%s</mapping>' % value)
+        for value in EPISODE_MAPPINGS
+    ] + [
+        ElementTree.fromstring('<mapping anidbseason="0" tvdbseason="0" start="1" end="5" offset="12"/>')
+    ]
+
+    iterations = context.count // len(mappings)
+
+    def run():
+        for _ in range(iterations):
+            item = Show(collection, identifiers={'anidb': '1', 'tvdb': '2'}, names=set(), default_season='1')
+
+            BaseParser.parse_mappings(item, collection, mappings)
+
+    return run, iterations
+
+
+def parse_collection(source, target):
+    def setup(context):
+        collection = create_collection(source, target)
+        nodes = list(ElementTree.parse(context.anime_list()).getroot().findall('anime'))
+
+        prime_metadata(nodes)
+
+        def run():
+            for node in nodes:
+                for _ in Parser.parse(collection, node, use_absolute_mapper=False):
+                    pass
+
+        return run, len(nodes)
+
+    return setup
+
+
+for _source, _target in COLLECTIONS:
+    benchmark('parser.parse[%s->%s]' % (_source, _target))(parse_collection(_source, _target))
+
+
+@benchmark('parser.parse_many[all]')
+def parse_many(context):
+    collections = [create_collection(source, target) for source, target in COLLECTIONS]
+    nodes = list(ElementTree.parse(context.anime_list()).getroot().findall('anime'))
+
+    prime_metadata(nodes)
+
+    def run():
+        for node in nodes:
+            for records in Parser.parse_many(collections, node, use_absolute_mapper=False):
+                for record in records:
+                    record.construct()
+
+    return run, len(nodes)
@@ -0,0 +1,53 @@
+from tests.benchmarks import core
+from tests.benchmarks import parser_benchmarks, source_benchmarks, startup_benchmarks, xml_benchmarks  # noqa
+
+from argparse import ArgumentParser
+import logging
+import sys
+
+
+def main():
+    parser = ArgumentParser(description='Run the AniDB updater benchmarks')
+    parser.add_argument('names', nargs='*', help='Benchmark name prefixes to run (defaults to all)')
+    parser.add_argument('--count', type=int, default=2000, help='Number of <anime> entries to generate')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of times to run each benchmark')
+    parser.add_argument('--save', help='Save results to a JSON file')
+    parser.add_argument('--compare', help='Compare results with a baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown before reporting a regression')
+
+    args = parser.parse_args()
+
+    # Silence updater logging
+    logging.basicConfig(level=logging.ERROR)
+
+    # Run benchmarks
+    results = {}
+
+    print('%-40s %10s %14s %14s' % ('Benchmark', 'Operations', 'Best (ms)', 'Per op (us)'))
+
+    for name, result in core.run(args.names, count=args.count, repeat=args.repeat):
+        results[name] = result
+
+        print('%-40s %10d %14.2f %14.2f' % (
+            name, result['operations'],
+            result['best'] * 1000,
+            result['best'] / result['operations'] * 1000000
+        ))
+
+    if args.save:
+        core.save(args.save, results)
+
+    # Compare results with baseline
+    if not args.compare:
+        return 0
+
+    regressions = core.compare(core.load(args.compare), results, threshold=args.threshold)
+
+    for name, expected, actual in regressions:
+        print('Regression detected in %s: %.2f us -> %.2f us per op' % (name, expected * 1000000, actual * 1000000))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
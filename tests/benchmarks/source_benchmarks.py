@@ -0,0 +1,75 @@
+from oem_database_updater_anidb.core.digests import scan_digests
+from oem_database_updater_anidb.core.index import IdentifierIndex
+from oem_database_updater_anidb.main import AniDB
+from oem_database_updater_anidb.metadata.core.cache import MetadataCache
+from tests.benchmarks.core import benchmark
+from tests.benchmarks.parser_benchmarks import prime_metadata
+from tests.core.helpers import create_collection, create_source
+
+from xml.etree import ElementTree
+
+
+def process(keys, group_size=3, **params):
+    def setup(context):
+        path = context.anime_list(group_size=group_size)
+
+        prime_metadata(ElementTree.parse(path).getroot().findall('anime'))
+
+        def run():
+            MetadataCache.configure(enabled=False)
+
+            # Construct sources (with empty collections)
+            sources = [
+                create_source(create_collection(source, target), **params)
+                for source, target in keys
+            ]
+
+            AniDB.process_many(sources, path)
+
+        return run, context.count
+
+    return setup
+
+
+benchmark('source.process[anidb->tvdb]')(process([('anidb', 'tvdb')]))
+benchmark('source.process[tvdb->anidb]')(process([('tvdb', 'anidb')]))
+benchmark('source.process[tvdb->anidb, groups of 50]')(process([('tvdb', 'anidb')], group_size=50))
+
+benchmark('source.process_many[all]')(process([
+    ('anidb', 'imdb'),
+    ('anidb', 'tmdb:movie'),
+    ('anidb', 'tmdb:show'),
+    ('anidb', 'tvdb')
+]))
+
+
+@benchmark('source.index.build')
+def index_build(context):
+    path = context.anime_list()
+
+    def run():
+        IdentifierIndex.build(path)
+
+    return run, context.count
+
+
+@benchmark('source.index.lookup')
+def index_lookup(context):
+    index = IdentifierIndex.build(context.anime_list())
+    keys = list(index.offsets['anidb'].keys())
+
+    def run():
+        for key in keys:
+            index.lookup('anidb', key)
+
+    return run, len(keys)
+
+
+@benchmark('source.scan_digests')
+def digests_scan(context):
+    path = context.anime_list()
+
+    def run():
+        scan_digests(path)
+
+    return run, context.count
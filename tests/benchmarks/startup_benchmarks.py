@@ -0,0 +1,29 @@
+from tests.benchmarks.core import benchmark
+
+import os
+import subprocess
+import sys
+
+STARTUP_COUNT = 5
+
+
+def run_python(code):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(sys.path)
+
+    def run():
+        for _ in range(STARTUP_COUNT):
+            subprocess.check_call([sys.executable, '-c', code], env=env)
+
+    return run
+
+
+@benchmark('startup.python')
+def startup_python(context):
+    # Baseline (interpreter startup)
+    return run_python('pass'), STARTUP_COUNT
+
+
+@benchmark('startup.import[main]')
+def startup_main(context):
+    return run_python('from oem_database_updater_anidb.main import AniDB'), STARTUP_COUNT
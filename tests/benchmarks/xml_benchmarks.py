@@ -0,0 +1,54 @@
+from oem_database_updater_anidb.core.backend import BACKENDS, XmlBackend
+from oem_database_updater_anidb.core.mapped import MappedSource
+from oem_database_updater_anidb.main import AniDB
+from oem_database_updater_anidb.metadata.core.cache import MetadataCache
+from tests.benchmarks.core import benchmark
+from tests.benchmarks.parser_benchmarks import prime_metadata
+from tests.core.helpers import create_collection, create_source
+
+from xml.etree import ElementTree
+
+
+def parse_elements(backend):
+    def setup(context):
+        source = MappedSource(context.anime_list()).open()
+        data = [element.data() for element in source.iter_elements()]
+        source.close()
+
+        def run():
+            for value in data:
+                backend.fromstring(value).find('name')
+
+        return run, len(data)
+
+    return setup
+
+
+def process(backend):
+    def setup(context):
+        path = context.anime_list()
+
+        prime_metadata(ElementTree.parse(path).getroot().findall('anime'))
+
+        def run():
+            MetadataCache.configure(enabled=False)
+
+            AniDB.process_many([
+                create_source(create_collection('anidb', 'tvdb'), **{'xml-backend': backend.__key__}),
+                create_source(create_collection('tvdb', 'anidb'), **{'xml-backend': backend.__key__})
+            ], path)
+
+            # Reset backend
+            XmlBackend.configure()
+
+        return run, context.count
+
+    return setup
+
+
+for _key, _backend in sorted(BACKENDS.items()):
+    if not _backend.available():
+        continue
+
+    benchmark('xml.fromstring[%s]' % _key)(parse_elements(_backend))
+    benchmark('xml.process_many[%s]' % _key)(process(_backend))
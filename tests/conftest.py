@@ -0,0 +1,17 @@
+from oem_database_updater_anidb.parsers import Parser
+
+import pytest
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    calls = []
+
+    def parse_records(collection, node, anime=None, use_absolute_mapper=True):
+        calls.append((collection.source, node.attrib.get('anidbid')))
+        return original(collection, node, anime=anime, use_absolute_mapper=use_absolute_mapper)
+
+    original = Parser.parse_records
+    monkeypatch.setattr(Parser, 'parse_records', staticmethod(parse_records))
+
+    return calls
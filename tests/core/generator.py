@@ -0,0 +1,59 @@
+import io
+import six
+
+ENTRY_TEMPLATES = [
+    (
+        '  <anime anidbid="%(anidb_id)d" tvdbid="%(tvdb_id)d" defaulttvdbseason="1">\n'
+        '    <name>Generated Show %(anidb_id)d</name>\n'
+        '    <mapping-list>\n'
+        '      <mapping anidbseason="0" tvdbseason="0">;1-0;2-0;3-0;</mapping>\n'
+        '    </mapping-list>\n'
+        '  </anime>\n'
+    ),
+    (
+        '  <anime anidbid="%(anidb_id)d" tvdbid="%(tvdb_id)d" defaulttvdbseason="0" episodeoffset="%(offset)d">\n'
+        '    <name>Generated Special %(anidb_id)d</name>\n'
+        '    <mapping-list>\n'
+        '      <mapping anidbseason="1" tvdbseason="0">;1-%(offset)d+%(next)d;2-0;</mapping>\n'
+        '      <mapping anidbseason="0" tvdbseason="0" start="1" end="5" offset="%(offset)d"/>\n'
+        '    </mapping-list>\n'
+        '    <supplemental-info>\n'
+        '      <studio>Generated Studio</studio>\n'
+        '    </supplemental-info>\n'
+        '  </anime>\n'
+    ),
+    (
+        '  <anime anidbid="%(anidb_id)d" tvdbid="movie" defaulttvdbseason="1" '
+        'tmdbid="%(tmdb_id)d" tmdbmid="%(tmdb_id)d" imdbid="tt%(imdb_id)07d">\n'
+        '    <name>Generated Movie %(anidb_id)d</name>\n'
+        '  </anime>\n'
+    )
+]
+
+
+def generate_entries(count, group_size=3):
+    for x in six.moves.xrange(count):
+        template = ENTRY_TEMPLATES[x % len(ENTRY_TEMPLATES)]
+
+        yield template % {
+            'anidb_id': x + 1,
+            'tvdb_id': 70000 + (x // group_size),
+            'tmdb_id': 1000 + x,
+            'imdb_id': 100000 + x,
+
+            'offset': (x % 12) + 1,
+            'next': (x % 12) + 2
+        }
+
+
+def generate_anime_list(path, count, group_size=3):
+    with io.open(path, 'w', encoding='utf-8') as fp:
+        fp.write(u'<?xml version="1.0" encoding="utf-8"?>\n')
+        fp.write(u'<anime-list>\n')
+
+        for entry in generate_entries(count, group_size):
+            fp.write(six.text_type(entry))
+
+        fp.write(u'</anime-list>\n')
+
+    return path
@@ -0,0 +1,31 @@
+from oem_database_updater_anidb.main import AniDB
+from tests.core.mock import MockCollection, MockFormat, MockStorage
+
+
+def create_collection(source, target):
+    return MockCollection(source, target, storage=MockStorage(MockFormat(False)))
+
+
+def create_source(collection, **params):
+    source = AniDB(collection, {})
+
+    # Override parameter lookups
+    source.param = lambda key: params.get(key)
+    return source
+
+
+def process(path, collections=None, **params):
+    if collections is None:
+        collections = [
+            create_collection('anidb', 'tvdb'),
+            create_collection('tvdb', 'anidb')
+        ]
+
+    sources = [
+        create_source(collection, **params)
+        for collection in collections
+    ]
+
+    assert AniDB.process_many(sources, path) is True
+    return sources
+
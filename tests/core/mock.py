@@ -5,12 +5,46 @@ class MockCollection(object):
 
         self.storage = storage
 
+        self.index = MockIndex()
+        self.items = {}
+
+    def get(self, key):
+        return self.items.get(key)
+
+    def set(self, key, metadata):
+        self.items[key] = metadata
+
+    def __repr__(self):
+        return '<MockCollection %s -> %s>' % (self.source, self.target)
+
 
 class MockFormat(object):
     def __init__(self, supports_binary):
         self.__supports_binary__ = supports_binary
 
 
+class MockIndex(object):
+    def create(self, key):
+        return MockMetadata(key)
+
+
+class MockMetadata(object):
+    def __init__(self, key):
+        self.key = key
+
+        self.hashes = {}
+        self.item = None
+
+        self.writes = 0
+
+    def update(self, item, hash_key, hash):
+        self.item = item
+        self.hashes[hash_key] = hash
+
+        self.writes += 1
+        return True
+
+
 class MockStorage(object):
     def __init__(self, fmt):
         self.format = fmt